@@ -0,0 +1,47 @@
+"""
+SQL helpers shared by the aggregate/rollup endpoints.
+
+Date bucketing has no portable SQL spelling, so it is built per dialect:
+date_trunc() on PostgreSQL and date()/strftime() on SQLite (used locally).
+"""
+from sqlalchemy import Date, cast, func, literal_column
+
+PERIODS = ("day", "week", "month")
+
+def shift_minutes(column, minutes: int, dialect_name: str):
+    """Return a SQL expression adding a fixed number of minutes to a DateTime column."""
+    minutes = int(minutes)
+    if not minutes:
+        return column
+    if dialect_name == "sqlite":
+        return func.datetime(column, f"{minutes:+d} minutes")
+    # Inlined for the same GROUP BY reason as in date_bucket
+    return column + literal_column(f"interval '{minutes} minutes'")
+
+def date_bucket(column, period: str, dialect_name: str, tz_offset_minutes: int = 0):
+    """
+    Return a SQL expression truncating a DateTime column to the start of its
+    day, ISO week (Monday) or month. tz_offset_minutes shifts the stored
+    (UTC) timestamps first, so buckets follow the client's local midnight.
+    """
+    if period not in PERIODS:
+        raise ValueError(f"Unsupported period {period!r}")
+
+    column = shift_minutes(column, tz_offset_minutes, dialect_name)
+    if dialect_name == "sqlite":
+        if period == "day":
+            return func.date(column)
+        if period == "week":
+            # 'weekday 0' moves forward to Sunday, then back 6 days to Monday
+            return func.date(column, "weekday 0", "-6 days")
+        return func.strftime("%Y-%m-01", column)
+
+    # Inline the (validated) period literal: a bound parameter would differ between
+    # the SELECT and GROUP BY clauses and PostgreSQL would reject the grouping
+    return cast(func.date_trunc(literal_column(f"'{period}'"), column), Date)
+
+def bucket_key(value) -> str:
+    """Normalize a bucket value (date or SQLite date string) to 'YYYY-MM-DD'."""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()[:10]
+    return str(value)[:10]
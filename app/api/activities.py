@@ -1,17 +1,61 @@
 # Create app/api/activities.py
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
+from sqlalchemy import func, insert, select, tuple_
 from typing import List, Optional
 from datetime import datetime
 from app import models, schemas
 from app.db import get_db
+from app.catalog_versions import bump_version, current_version, not_modified
+from app.cache import catalog_cache
+from app.aggregation import date_bucket, bucket_key
+from app.serialization import RowSerializer
 
 router = APIRouter()
 
+ACTIVITY_LOG_ROWS = RowSerializer(models.ActivityLog, schemas.ActivityLog)
+
 def calculate_calories_burned(kcal_per_hour: float, duration_minutes: int) -> float:
     """Simple calorie calculation: (kcal/hour * minutes) / 60"""
     return round((kcal_per_hour * duration_minutes) / 60, 1)
 
+def get_activity_catalog(db: Session, user_name: str, version: Optional[int] = None) -> List[schemas.Activity]:
+    """A user's activities at the given (default: current) catalog version, served from the per-worker cache"""
+    if version is None:
+        version = current_version(db, user_name, "activities")
+    return catalog_cache.get_or_load("activities", user_name, version, lambda: [
+        schemas.Activity.model_validate(a, from_attributes=True)
+        for a in db.query(models.Activity).filter(models.Activity.user_name == user_name).all()
+    ])
+
+def find_activity(db: Session, user_name: str, name: str):
+    """Look up a user's activity by name, via the version-checked catalog cache first"""
+    for activity in get_activity_catalog(db, user_name):
+        if activity.name == name:
+            return activity
+    # Not in the cached copy; it may have been created moments ago in another worker
+    return db.query(models.Activity).filter(
+        models.Activity.name == name,
+        models.Activity.user_name == user_name
+    ).first()
+
+def filter_activity_logs(
+    query,
+    user_name: str,
+    activity_name: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+):
+    """Apply the shared user/activity/date-range filters to an ActivityLog query or select()."""
+    query = query.filter(models.ActivityLog.user_name == user_name)
+    if activity_name:
+        query = query.filter(models.ActivityLog.activity_name == activity_name)
+    if start_date:
+        query = query.filter(models.ActivityLog.date >= start_date)
+    if end_date:
+        query = query.filter(models.ActivityLog.date <= end_date)
+    return query
+
 @router.post("/users/{user_name}/initialize_activities")
 def initialize_user_activities(user_name: str, db: Session = Depends(get_db)):
     """Initialize a new user with default activity types"""
@@ -44,25 +88,33 @@ def initialize_user_activities(user_name: str, db: Session = Depends(get_db)):
     for activity_data in default_activities:
         activity = models.Activity(user_name=user_name, **activity_data)
         db.add(activity)
+    bump_version(db, user_name, "activities")
     
     db.commit()
+    catalog_cache.invalidate("activities", user_name)
     return {"message": f"Initialized {len(default_activities)} activities for {user_name}"}
 
 @router.get("/activities", response_model=List[schemas.Activity])
 def get_user_activities(
+    request: Request,
+    response: Response,
     user_name: str = Query(..., description="Username to get activities for"),
     db: Session = Depends(get_db)
 ):
-    """Get all activities for a specific user"""
-    activities = db.query(models.Activity).filter(models.Activity.user_name == user_name).all()
-    return activities
+    """Get all activities for a specific user. Supports If-None-Match with the returned ETag."""
+    cached = not_modified(request, response, db, user_name, "activities")
+    if cached:
+        return cached
+    return get_activity_catalog(db, user_name)
 
 @router.post("/activities", response_model=schemas.Activity)
 def create_activity(activity: schemas.ActivityCreate, db: Session = Depends(get_db)):
     """Create a new custom activity for user"""
     db_activity = models.Activity(**activity.dict())
     db.add(db_activity)
+    bump_version(db, activity.user_name, "activities")
     db.commit()
+    catalog_cache.invalidate("activities", activity.user_name)
     db.refresh(db_activity)
     return db_activity
 
@@ -84,8 +136,10 @@ def update_activity(
     
     activity.name = activity_update.name # type: ignore
     activity.kcal_per_hour = activity_update.kcal_per_hour  # type: ignore # ADD THIS LINE
+    bump_version(db, user_name, "activities")
     
     db.commit()
+    catalog_cache.invalidate("activities", user_name)
     db.refresh(activity)
     return activity
 
@@ -105,38 +159,34 @@ def delete_activity(
         raise HTTPException(status_code=404, detail="Activity not found")
     
     db.delete(activity)
+    bump_version(db, user_name, "activities")
     db.commit()
+    catalog_cache.invalidate("activities", user_name)
     return {"message": "Activity deleted"}
 
 @router.get("/activity_logs", response_model=List[schemas.ActivityLog])
 def get_activity_logs(
+    request: Request,
     user_name: str = Query(..., description="Username to get logs for"),
     activity_name: Optional[str] = Query(None, description="Filter by specific activity name"),
     start_date: Optional[datetime] = Query(None, description="Filter from this date"),
     end_date: Optional[datetime] = Query(None, description="Filter until this date"),
+    format: str = Query("rows", pattern="^(rows|columnar)$", description="rows (list of objects) or columnar (one array per field)"),
     db: Session = Depends(get_db)
 ):
-    """Get activity logs with optional filtering"""
-    query = db.query(models.ActivityLog).filter(models.ActivityLog.user_name == user_name)
-    
-    if activity_name:
-        query = query.filter(models.ActivityLog.activity_name == activity_name)
-    if start_date:
-        query = query.filter(models.ActivityLog.date >= start_date)
-    if end_date:
-        query = query.filter(models.ActivityLog.date <= end_date)
-        
-    return query.order_by(models.ActivityLog.date.desc()).all()
+    """Get activity logs with optional filtering, as JSON rows, columnar JSON or MessagePack"""
+    rows = db.execute(
+        filter_activity_logs(select(*ACTIVITY_LOG_ROWS.columns), user_name, activity_name, start_date, end_date)
+        .order_by(models.ActivityLog.date.desc())
+    ).mappings().all()
+    return ACTIVITY_LOG_ROWS.response(rows, request, format, user_name)
 
 @router.post("/activity_logs", response_model=schemas.ActivityLog)
 def create_activity_log(log_data: schemas.ActivityLogCreate, db: Session = Depends(get_db)):
     """Log a new activity session with automatic calorie calculation"""
     
     # Get the activity to access kcal_per_hour by name
-    activity = db.query(models.Activity).filter(
-        models.Activity.name == log_data.activity_name,
-        models.Activity.user_name == log_data.user_name
-    ).first()
+    activity = find_activity(db, log_data.user_name, log_data.activity_name)
     
     if not activity:
         raise HTTPException(status_code=404, detail="Activity not found")
@@ -157,24 +207,48 @@ def create_activity_log(log_data: schemas.ActivityLogCreate, db: Session = Depen
     db.refresh(db_log)
     return db_log
 
-@router.get("/activity_logs/stats")
-def get_activity_stats(
-    user_name: str = Query(..., description="Username to get stats for"),
-    start_date: Optional[datetime] = Query(None, description="Stats from this date"),
-    end_date: Optional[datetime] = Query(None, description="Stats until this date"),
-    db: Session = Depends(get_db)
-):
-    """Get activity statistics for a user"""
-    query = db.query(models.ActivityLog).filter(models.ActivityLog.user_name == user_name)
-    
-    if start_date:
-        query = query.filter(models.ActivityLog.date >= start_date)
-    if end_date:
-        query = query.filter(models.ActivityLog.date <= end_date)
-    
-    logs = query.all()
-    
+@router.post("/activity_logs/bulk", response_model=List[schemas.ActivityLog])
+def create_activity_logs_bulk(logs: List[schemas.ActivityLogCreate], db: Session = Depends(get_db)):
+    """
+    Log up to 1000 activity sessions at once.
+    All referenced activities are resolved with one query, calories are computed
+    in one pass and the logs are written with a single multi-row INSERT ... RETURNING.
+    """
     if not logs:
+        raise HTTPException(status_code=400, detail="Activity logs list cannot be empty")
+
+    if len(logs) > 1000:
+        raise HTTPException(status_code=400, detail="Cannot create more than 1000 activity logs in a single request")
+
+    keys = {(log.user_name, log.activity_name) for log in logs}
+    kcal_per_hour = dict(
+        ((row.user_name, row.name), row.kcal_per_hour)
+        for row in db.query(models.Activity.user_name, models.Activity.name, models.Activity.kcal_per_hour)
+        .filter(tuple_(models.Activity.user_name, models.Activity.name).in_(keys))
+    )
+    missing = sorted({name for (user_name, name) in keys if (user_name, name) not in kcal_per_hour})
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Activity not found: {', '.join(missing)}")
+
+    rows = [
+        {
+            **log.dict(),
+            "calories_burned": calculate_calories_burned(kcal_per_hour[(log.user_name, log.activity_name)], log.duration_minutes),
+        }
+        for log in logs
+    ]
+    db_logs = db.execute(
+        insert(models.ActivityLog.__table__).returning(
+            *models.ActivityLog.__table__.c, sort_by_parameter_order=True
+        ),
+        rows,
+    ).mappings().all()
+    db.commit()
+    return db_logs
+
+def format_activity_stats(session_count, total_duration, total_calories) -> dict:
+    """Shape one row of count/sum aggregates into the stats response format"""
+    if not session_count:
         return {
             "total_sessions": 0,
             "total_duration_minutes": 0,
@@ -182,17 +256,56 @@ def get_activity_stats(
             "average_session_duration": 0,
             "average_calories_per_session": 0
         }
-    
-    total_duration = sum(log.duration_minutes for log in logs)
-    total_calories = sum(log.calories_burned for log in logs)
-    session_count = len(logs)
-    
+
     return {
         "total_sessions": session_count,
         "total_duration_minutes": total_duration,
-        "total_calories_burned": round(total_calories, 1), # type: ignore
-        "average_session_duration": round(total_duration / session_count, 1), # type: ignore
-        "average_calories_per_session": round(total_calories / session_count, 1) # type: ignore
+        "total_calories_burned": round(total_calories, 1),
+        "average_session_duration": round(total_duration / session_count, 1),
+        "average_calories_per_session": round(total_calories / session_count, 1)
+    }
+
+@router.get("/activity_logs/stats")
+def get_activity_stats(
+    user_name: str = Query(..., description="Username to get stats for"),
+    start_date: Optional[datetime] = Query(None, description="Stats from this date"),
+    end_date: Optional[datetime] = Query(None, description="Stats until this date"),
+    group_by: Optional[str] = Query(None, pattern="^(day|week|month|activity)$", description="Bucket stats by day, week, month or activity"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get activity statistics for a user.
+    Counts and sums are computed in the database, so only one row per bucket is transferred.
+    Without group_by the totals are returned directly; with group_by a list of buckets is returned.
+    """
+    aggregates = [
+        func.count(models.ActivityLog.id).label("session_count"),
+        func.sum(models.ActivityLog.duration_minutes).label("total_duration"),
+        func.sum(models.ActivityLog.calories_burned).label("total_calories"),
+    ]
+
+    if group_by is None:
+        stmt = filter_activity_logs(select(*aggregates), user_name, start_date=start_date, end_date=end_date)
+        row = db.execute(stmt).one()
+        return format_activity_stats(row.session_count, row.total_duration, row.total_calories)
+
+    if group_by == "activity":
+        bucket = models.ActivityLog.activity_name
+    else:
+        bucket = date_bucket(models.ActivityLog.date, group_by, db.get_bind().dialect.name)
+    bucket = bucket.label("bucket")
+
+    stmt = filter_activity_logs(select(bucket, *aggregates), user_name, start_date=start_date, end_date=end_date)
+    rows = db.execute(stmt.group_by(bucket).order_by(bucket)).all()
+    return {
+        "group_by": group_by,
+        "buckets": [
+            {
+                "bucket": row.bucket if group_by == "activity" else bucket_key(row.bucket),
+                **format_activity_stats(row.session_count, row.total_duration, row.total_calories),
+            }
+            for row in rows
+        ],
     }
 
 @router.delete("/activity_logs/{log_id}")
@@ -0,0 +1,103 @@
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from typing import Dict, List, Optional
+from datetime import datetime
+from app import models, schemas
+from app.db import get_async_db
+from app.api.training_sets import (
+    filter_training_sets,
+    training_sets_page_stmt,
+    build_training_sets_page,
+    last_training_dates_stmt,
+    format_last_training_dates,
+    TRAINING_SET_ROWS,
+)
+from app.api.food import filter_food_logs, FOOD_LOG_ROWS
+from app.api.activities import filter_activity_logs, ACTIVITY_LOG_ROWS
+
+# Async versions of the read-heavy history endpoints.
+# Only mounted when DATABASE_ASYNC is enabled (see app/main.py); they are
+# included ahead of the sync routers, so they take over these paths while
+# all other endpoints keep using the sync session.
+router = APIRouter()
+
+# =========================
+# TrainingSet Endpoints
+# =========================
+
+@router.get("/training_sets", response_model=List[schemas.TrainingSet])
+async def read_training_sets(
+    request: Request,
+    user_name: str = Query(..., description="Username to filter sets by"),
+    exercise_id: Optional[int] = Query(None, description="Exercise ID to filter sets by"),
+    start_date: Optional[datetime] = Query(None, description="Only sets on or after this date"),
+    end_date: Optional[datetime] = Query(None, description="Only sets on or before this date"),
+    format: str = Query("rows", pattern="^(rows|columnar)$", description="rows (list of objects) or columnar (one array per field)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    List all training sets for a user, optionally filtered by exercise and date range.
+    """
+    stmt = filter_training_sets(select(*TRAINING_SET_ROWS.columns), user_name, exercise_id, start_date, end_date)
+    return TRAINING_SET_ROWS.response((await db.execute(stmt)).mappings().all(), request, format, user_name)
+
+@router.get("/training_sets/page", response_model=schemas.TrainingSetPage)
+async def read_training_sets_page(
+    user_name: str = Query(..., description="Username to filter sets by"),
+    exercise_id: Optional[int] = Query(None, description="Exercise ID to filter sets by"),
+    start_date: Optional[datetime] = Query(None, description="Only sets on or after this date"),
+    end_date: Optional[datetime] = Query(None, description="Only sets on or before this date"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(500, ge=1, le=5000, description="Maximum number of sets per page"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    List training sets one page at a time using keyset pagination on (date, id).
+    """
+    stmt = training_sets_page_stmt(user_name, exercise_id, start_date, end_date, cursor, limit)
+    return build_training_sets_page((await db.scalars(stmt)).all(), limit)
+
+@router.get("/training_sets/last_dates", response_model=Dict[str, str])
+async def read_last_training_dates_per_exercise(
+    user_name: str = Query(..., description="Username to get last training dates for"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get the last training date for each exercise for a specific user.
+    """
+    results = (await db.execute(last_training_dates_stmt(user_name))).all()
+    return format_last_training_dates(results)
+
+# =========================
+# Log Endpoints
+# =========================
+
+@router.get("/food_logs", response_model=List[schemas.FoodLog])
+async def get_food_logs(
+    request: Request,
+    user_name: str = Query(...),
+    food_name: Optional[str] = Query(None),
+    start_date: Optional[datetime] = Query(None),
+    end_date: Optional[datetime] = Query(None),
+    format: str = Query("rows", pattern="^(rows|columnar)$", description="rows (list of objects) or columnar (one array per field)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    stmt = filter_food_logs(select(*FOOD_LOG_ROWS.columns), user_name, food_name, start_date, end_date)
+    rows = (await db.execute(stmt.order_by(models.FoodLog.date.desc()))).mappings().all()
+    return FOOD_LOG_ROWS.response(rows, request, format, user_name)
+
+@router.get("/activity_logs", response_model=List[schemas.ActivityLog])
+async def get_activity_logs(
+    request: Request,
+    user_name: str = Query(..., description="Username to get logs for"),
+    activity_name: Optional[str] = Query(None, description="Filter by specific activity name"),
+    start_date: Optional[datetime] = Query(None, description="Filter from this date"),
+    end_date: Optional[datetime] = Query(None, description="Filter until this date"),
+    format: str = Query("rows", pattern="^(rows|columnar)$", description="rows (list of objects) or columnar (one array per field)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get activity logs with optional filtering"""
+    stmt = filter_activity_logs(select(*ACTIVITY_LOG_ROWS.columns), user_name, activity_name, start_date, end_date)
+    rows = (await db.execute(stmt.order_by(models.ActivityLog.date.desc()))).mappings().all()
+    return ACTIVITY_LOG_ROWS.response(rows, request, format, user_name)
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from app import models, schemas
+from app.db import get_db
+from app.catalog_versions import make_etag
+from app.api.exercises import get_exercise_catalog
+from app.api.activities import get_activity_catalog
+from app.api.training_sets import last_training_dates_stmt, format_last_training_dates
+
+router = APIRouter()
+
+# Plain per-user lists included in the bootstrap document
+BOOTSTRAP_LISTS = {
+    "workouts": models.Workout,
+    "workout_units": models.WorkoutUnit,
+    "foods": models.FoodItem,
+    "calendar_notes": models.CalendarNote,
+    "calendar_workouts": models.CalendarWorkout,
+    "periods": models.Period,
+}
+
+# Tables whose list endpoints honour If-None-Match
+ETAG_TABLES = ["exercises", "workouts", "workout_units", "activities", "foods", "calendar_notes", "periods"]
+
+@router.get("/bootstrap", response_model=schemas.Bootstrap)
+def read_bootstrap(
+    user_name: str = Query(..., description="Username to load the startup data for"),
+    db: Session = Depends(get_db)
+):
+    """
+    Everything the app loads on startup in one request, read on a single session:
+    the exercises, workouts, workout_units, activities, foods, calendar_notes,
+    calendar_workouts and periods lists plus /training_sets/last_dates.
+    etags holds the current ETag of each list, for later If-None-Match requests.
+    """
+    # Versions first: every list below is then at least as recent as its ETag
+    versions = dict(
+        db.query(models.CatalogVersion.table_name, models.CatalogVersion.version)
+        .filter(models.CatalogVersion.user_name == user_name)
+        .all()
+    )
+    document = {
+        table: db.query(model).filter(model.user_name == user_name).all()
+        for table, model in BOOTSTRAP_LISTS.items()
+    }
+    document["exercises"] = get_exercise_catalog(db, user_name, versions.get("exercises", 0))
+    document["activities"] = get_activity_catalog(db, user_name, versions.get("activities", 0))
+    document["last_training_dates"] = format_last_training_dates(db.execute(last_training_dates_stmt(user_name)).all())
+    document["etags"] = {table: make_etag(table, user_name, versions.get(table, 0)) for table in ETAG_TABLES}
+    return document
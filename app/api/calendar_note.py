@@ -1,20 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from typing import List
 from datetime import date
 from app import models, schemas
 from app.db import get_db
+from app.catalog_versions import bump_version, not_modified
 
 router = APIRouter()
 
 @router.get("/calendar_notes", response_model=List[schemas.CalendarNote])
-def get_calendar_notes(user_name: str = Query(...), db: Session = Depends(get_db)):
+def get_calendar_notes(request: Request, response: Response, user_name: str = Query(...), db: Session = Depends(get_db)):
+    cached = not_modified(request, response, db, user_name, "calendar_notes")
+    if cached:
+        return cached
     return db.query(models.CalendarNote).filter(models.CalendarNote.user_name == user_name).all()
 
 @router.post("/calendar_notes", response_model=schemas.CalendarNote)
 def create_calendar_note(note: schemas.CalendarNoteCreate, db: Session = Depends(get_db)):
     db_note = models.CalendarNote(**note.dict())
     db.add(db_note)
+    bump_version(db, note.user_name, "calendar_notes")
     db.commit()
     db.refresh(db_note)
     return db_note  
@@ -26,6 +31,9 @@ def update_calendar_note(note_id: int, note: schemas.CalendarNoteCreate, db: Ses
     if not db_note:
         raise HTTPException(status_code=404, detail="Calendar note not found")
     
+    for user_name in {db_note.user_name, note.user_name}:
+        bump_version(db, user_name, "calendar_notes")
+
     # Update the note fields
     for field, value in note.dict().items():
         setattr(db_note, field, value)
@@ -40,5 +48,6 @@ def delete_calendar_note(note_id: int, db: Session = Depends(get_db)):
     if not note:
         raise HTTPException(status_code=404, detail="Calendar note not found")
     db.delete(note)
+    bump_version(db, note.user_name, "calendar_notes")
     db.commit()
     return {"message": "Calendar note deleted"}
\ No newline at end of file
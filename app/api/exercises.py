@@ -1,24 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app import models, schemas
 from app.db import get_db
+from app.catalog_versions import bump_version, current_version, not_modified
+from app.cache import catalog_cache
 
 router = APIRouter()
 
+def get_exercise_catalog(db: Session, user_name: str, version: Optional[int] = None) -> List[schemas.Exercise]:
+    """A user's exercises at the given (default: current) catalog version, served from the per-worker cache"""
+    if version is None:
+        version = current_version(db, user_name, "exercises")
+    return catalog_cache.get_or_load("exercises", user_name, version, lambda: [
+        schemas.Exercise.model_validate(e, from_attributes=True)
+        for e in db.query(models.Exercise).filter(models.Exercise.user_name == user_name).all()
+    ])
+
 # =========================
 # Exercise Endpoints
 # =========================
 
 @router.get("/exercises", response_model=List[schemas.Exercise])
 def read_exercises(
+    request: Request,
+    response: Response,
     user_name: str = Query(..., description="Username to filter exercises by"),
     db: Session = Depends(get_db)
 ):
     """
     List all exercises for a user.
+    Supports If-None-Match with the returned ETag.
     """
-    return db.query(models.Exercise).filter(models.Exercise.user_name == user_name).all()
+    cached = not_modified(request, response, db, user_name, "exercises")
+    if cached:
+        return cached
+    return get_exercise_catalog(db, user_name)
 
 @router.get("/exercises/{id}", response_model=schemas.Exercise)
 def read_exercise(id: int, db: Session = Depends(get_db)):
@@ -37,7 +54,9 @@ def create_exercise(exercise: schemas.ExerciseCreate, db: Session = Depends(get_
     """
     db_exercise = models.Exercise(**exercise.dict())
     db.add(db_exercise)
+    bump_version(db, exercise.user_name, "exercises")
     db.commit()
+    catalog_cache.invalidate("exercises", exercise.user_name)
     db.refresh(db_exercise)
     return db_exercise
 
@@ -49,9 +68,14 @@ def update_exercise(id: int, exercise: schemas.ExerciseCreate, db: Session = Dep
     db_exercise = db.query(models.Exercise).filter(models.Exercise.id == id).first()
     if not db_exercise:
         raise HTTPException(status_code=404, detail="Exercise not found")
+    user_names = {db_exercise.user_name, exercise.user_name}
+    for user_name in user_names:
+        bump_version(db, user_name, "exercises")
     for key, value in exercise.dict().items():
         setattr(db_exercise, key, value)
     db.commit()
+    for user_name in user_names:
+        catalog_cache.invalidate("exercises", user_name)
     db.refresh(db_exercise)
     return db_exercise
 
@@ -63,6 +87,9 @@ def delete_exercise(id: int, db: Session = Depends(get_db)):
     db_exercise = db.query(models.Exercise).filter(models.Exercise.id == id).first()
     if not db_exercise:
         raise HTTPException(status_code=404, detail="Exercise not found")
+    user_name = db_exercise.user_name
     db.delete(db_exercise)
+    bump_version(db, user_name, "exercises")
     db.commit()
+    catalog_cache.invalidate("exercises", user_name)
     return {"ok": True}
\ No newline at end of file
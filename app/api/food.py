@@ -1,20 +1,51 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
+from sqlalchemy import func, insert, select
 from typing import List, Optional
 from datetime import datetime
 from app import models, schemas
-from app.db import get_db
+from app.db import get_db, SessionLocal
+from app.catalog_versions import bump_version, not_modified
+from app.sync import record_table_cleared
+from app.serialization import RowSerializer
+from app.chunked_delete import DEFAULT_BATCH_SIZE, delete_user_rows_in_chunks
+from app.jobs import JobContext, job_runner, accepted
+from app.aggregation import date_bucket, bucket_key
 
 router = APIRouter()
 
+FOOD_LOG_ROWS = RowSerializer(models.FoodLog, schemas.FoodLog)
+
+def filter_food_logs(
+    query,
+    user_name: str,
+    food_name: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+):
+    """Apply the shared user/food/date-range filters to a FoodLog query or select()."""
+    query = query.filter(models.FoodLog.user_name == user_name)
+    if food_name:
+        query = query.filter(models.FoodLog.food_name == food_name)
+    if start_date:
+        query = query.filter(models.FoodLog.date >= start_date)
+    if end_date:
+        query = query.filter(models.FoodLog.date <= end_date)
+    return query
+
 @router.get("/foods", response_model=List[schemas.FoodItem])
-def get_user_foods(user_name: str = Query(...), db: Session = Depends(get_db)):
+def get_user_foods(request: Request, response: Response, user_name: str = Query(...), db: Session = Depends(get_db)):
+    cached = not_modified(request, response, db, user_name, "foods")
+    if cached:
+        return cached
     return db.query(models.FoodItem).filter(models.FoodItem.user_name == user_name).all()
 
 @router.post("/foods", response_model=schemas.FoodItem)
 def create_food(food: schemas.FoodItemCreate, db: Session = Depends(get_db)):
     db_food = models.FoodItem(**food.dict())
     db.add(db_food)
+    bump_version(db, food.user_name, "foods")
     db.commit()
     db.refresh(db_food)
     return db_food
@@ -27,27 +58,57 @@ def create_foods_bulk(foods: List[schemas.FoodItemCreate], db: Session = Depends
     if len(foods) > 1000:  # Add reasonable limit
         raise HTTPException(status_code=400, detail="Cannot create more than 1000 food items in a single request")
     
-    db_foods = []
-    for food in foods:
-        db_food = models.FoodItem(**food.dict())
-        db.add(db_food)
-        db_foods.append(db_food)
-    
+    # Single multi-row INSERT ... RETURNING instead of add() + refresh() per item
+    db_foods = db.execute(
+        insert(models.FoodItem.__table__).returning(
+            *models.FoodItem.__table__.c, sort_by_parameter_order=True
+        ),
+        [food.dict() for food in foods],
+    ).mappings().all()
+    for user_name in {food.user_name for food in foods}:
+        bump_version(db, user_name, "foods")
     db.commit()
-    for db_food in db_foods:
-        db.refresh(db_food)
     
     return db_foods
 
+def clear_foods_finalizer(user_name: str):
+    """Bookkeeping committed with the last batch of a chunked clear."""
+    def finalize(batch_db: Session):
+        bump_version(batch_db, user_name, "foods")
+        record_table_cleared(batch_db, user_name, "foods")
+    return finalize
+
+def clear_foods_job(job: JobContext, user_name: str, batch_size: int) -> dict:
+    with SessionLocal() as db:
+        total = db.query(models.FoodItem).filter(models.FoodItem.user_name == user_name).count()
+    job.progress(0, total)
+    deleted = delete_user_rows_in_chunks(models.FoodItem, user_name, batch_size, clear_foods_finalizer(user_name), on_progress=job.progress)
+    return {"deleted": deleted}
+
 @router.delete("/foods/bulk_clear")
-def bulk_clear_foods(user_name: str = Query(...), db: Session = Depends(get_db)):
-    """Clears all food items for a specific user using bulk delete"""
+def bulk_clear_foods(
+    user_name: str = Query(...),
+    chunked: bool = Query(False, description="Delete in short batches instead of one long transaction"),
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=100, le=100_000, description="Rows per batch in chunked mode"),
+    background: bool = Query(False, description="Run the chunked delete as a background job (202 with the job id)"),
+    db: Session = Depends(get_db)
+):
+    """Clears all food items for a specific user using bulk delete, optionally in batches"""
+    if background:
+        job_id = job_runner.submit("clear_foods", user_name, clear_foods_job, user_name, batch_size)
+        return JSONResponse(status_code=202, content=accepted(job_id, f"Clearing food items of {user_name} in the background"))
+    if chunked:
+        count = delete_user_rows_in_chunks(models.FoodItem, user_name, batch_size, clear_foods_finalizer(user_name))
+        return {"message": f"Successfully cleared {count} food items for user {user_name}"}
+
     try:
         # Count items before deletion for response
         count = db.query(models.FoodItem).filter(models.FoodItem.user_name == user_name).count()
         
         # Perform bulk delete
         db.query(models.FoodItem).filter(models.FoodItem.user_name == user_name).delete()
+        bump_version(db, user_name, "foods")
+        record_table_cleared(db, user_name, "foods")
         db.commit()
         
         return {"message": f"Successfully cleared {count} food items for user {user_name}"}
@@ -62,25 +123,67 @@ def delete_food(food_id: int, user_name: str = Query(...), db: Session = Depends
     if not food:
         raise HTTPException(status_code=404, detail="Food item not found")
     db.delete(food)
+    bump_version(db, user_name, "foods")
     db.commit()
     return {"message": "Food deleted"}
 
 @router.get("/food_logs", response_model=List[schemas.FoodLog])
 def get_food_logs(
+    request: Request,
     user_name: str = Query(...),
     food_name: Optional[str] = Query(None),
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
+    format: str = Query("rows", pattern="^(rows|columnar)$", description="rows (list of objects) or columnar (one array per field)"),
     db: Session = Depends(get_db)
 ):
-    query = db.query(models.FoodLog).filter(models.FoodLog.user_name == user_name)
-    if food_name:
-        query = query.filter(models.FoodLog.food_name == food_name)
-    if start_date:
-        query = query.filter(models.FoodLog.date >= start_date)
-    if end_date:
-        query = query.filter(models.FoodLog.date <= end_date)
-    return query.order_by(models.FoodLog.date.desc()).all()
+    rows = db.execute(
+        filter_food_logs(select(*FOOD_LOG_ROWS.columns), user_name, food_name, start_date, end_date)
+        .order_by(models.FoodLog.date.desc())
+    ).mappings().all()
+    return FOOD_LOG_ROWS.response(rows, request, format, user_name)
+
+@router.get("/food_logs/summary")
+def get_food_log_summary(
+    user_name: str = Query(...),
+    period: str = Query("day", pattern="^(day|week|month)$", description="Bucket size: day, week or month"),
+    start_date: Optional[datetime] = Query(None),
+    end_date: Optional[datetime] = Query(None),
+    tz_offset_minutes: int = Query(0, ge=-840, le=840, description="Client UTC offset in minutes (e.g. 120 for UTC+2), used for day boundaries"),
+    db: Session = Depends(get_db)
+):
+    """
+    Total calories and macros per day, week or month, computed in the database.
+    Each log contributes grams * value_per_100g / 100.
+    """
+    factor = models.FoodLog.grams / 100
+    bucket = date_bucket(models.FoodLog.date, period, db.get_bind().dialect.name, tz_offset_minutes).label("bucket")
+    stmt = select(
+        bucket,
+        func.count(models.FoodLog.id).label("entries"),
+        func.sum(factor * models.FoodLog.kcal_per_100g).label("kcal"),
+        func.sum(factor * models.FoodLog.protein_per_100g).label("protein"),
+        func.sum(factor * models.FoodLog.carbs_per_100g).label("carbs"),
+        func.sum(factor * models.FoodLog.fat_per_100g).label("fat"),
+    )
+    stmt = filter_food_logs(stmt, user_name, start_date=start_date, end_date=end_date)
+    rows = db.execute(stmt.group_by(bucket).order_by(bucket)).all()
+
+    return {
+        "period": period,
+        "tz_offset_minutes": tz_offset_minutes,
+        "buckets": [
+            {
+                "bucket": bucket_key(row.bucket),
+                "entries": row.entries,
+                "kcal": round(row.kcal, 1),
+                "protein": round(row.protein, 1),
+                "carbs": round(row.carbs, 1),
+                "fat": round(row.fat, 1),
+            }
+            for row in rows
+        ],
+    }
 
 @router.post("/food_logs", response_model=schemas.FoodLog)
 def create_food_log(log: schemas.FoodLogCreate, db: Session = Depends(get_db)):
@@ -90,6 +193,24 @@ def create_food_log(log: schemas.FoodLogCreate, db: Session = Depends(get_db)):
     db.refresh(db_log)
     return db_log
 
+@router.post("/food_logs/bulk", response_model=List[schemas.FoodLog])
+def create_food_logs_bulk(logs: List[schemas.FoodLogCreate], db: Session = Depends(get_db)):
+    """Create up to 1000 food logs with a single multi-row INSERT ... RETURNING"""
+    if not logs:
+        raise HTTPException(status_code=400, detail="Food logs list cannot be empty")
+
+    if len(logs) > 1000:
+        raise HTTPException(status_code=400, detail="Cannot create more than 1000 food logs in a single request")
+
+    db_logs = db.execute(
+        insert(models.FoodLog.__table__).returning(
+            *models.FoodLog.__table__.c, sort_by_parameter_order=True
+        ),
+        [log.dict() for log in logs],
+    ).mappings().all()
+    db.commit()
+    return db_logs
+
 @router.delete("/food_logs/{log_id}")
 def delete_food_log(log_id: int, user_name: str = Query(...), db: Session = Depends(get_db)):
     log = db.query(models.FoodLog).filter(models.FoodLog.id == log_id, models.FoodLog.user_name == user_name).first()
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List
+from app import models, schemas
+from app.db import get_db
+from app.jobs import job_to_dict
+
+router = APIRouter()
+
+# =========================
+# Job Endpoints
+# =========================
+
+@router.get("/jobs", response_model=List[schemas.Job])
+def read_jobs(
+    user_name: str = Query(..., description="Username to list jobs for"),
+    limit: int = Query(50, ge=1, le=500, description="Maximum number of jobs, newest first"),
+    db: Session = Depends(get_db)
+):
+    """
+    List a user's most recent background jobs.
+    """
+    jobs = (
+        db.query(models.Job)
+        .filter(models.Job.user_name == user_name)
+        .order_by(models.Job.id.desc())
+        .limit(limit)
+        .all()
+    )
+    return [job_to_dict(job) for job in jobs]
+
+@router.get("/jobs/{id}", response_model=schemas.Job)
+def read_job(id: int, db: Session = Depends(get_db)):
+    """
+    Get the state, progress and (once finished) result or error of a background job.
+    """
+    job = db.query(models.Job).filter(models.Job.id == id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_to_dict(job)
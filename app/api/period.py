@@ -1,20 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from typing import List
 from datetime import date
 from app import models, schemas
 from app.db import get_db
+from app.catalog_versions import bump_version, not_modified
 
 router = APIRouter()
 
 @router.get("/periods", response_model=List[schemas.Period])
-def get_periods(user_name: str = Query(...), db: Session = Depends(get_db)):
+def get_periods(request: Request, response: Response, user_name: str = Query(...), db: Session = Depends(get_db)):
+    cached = not_modified(request, response, db, user_name, "periods")
+    if cached:
+        return cached
     return db.query(models.Period).filter(models.Period.user_name == user_name).all()
 
 @router.post("/periods", response_model=schemas.Period)
 def create_period(period: schemas.PeriodCreate, db: Session = Depends(get_db)):
     db_period = models.Period(**period.dict())
     db.add(db_period)
+    bump_version(db, period.user_name, "periods")
     db.commit()
     db.refresh(db_period)
     return db_period
@@ -25,5 +30,6 @@ def delete_period(period_id: int, db: Session = Depends(get_db)):
     if not period:
         raise HTTPException(status_code=404, detail="Period not found")
     db.delete(period)
+    bump_version(db, period.user_name, "periods")
     db.commit()
     return {"message": "Period deleted"}
\ No newline at end of file
@@ -0,0 +1,84 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import datetime, timedelta
+from pydantic_core import to_json
+from app import models, schemas
+from app.db import get_db
+from app.serialization import RowSerializer, orjson
+
+router = APIRouter()
+
+# Response schema of each synced table, keyed like models.SYNC_MODELS
+SYNC_SCHEMAS = {
+    "exercises": schemas.Exercise,
+    "training_sets": schemas.TrainingSet,
+    "workouts": schemas.Workout,
+    "workout_units": schemas.WorkoutUnit,
+    "activities": schemas.Activity,
+    "activity_logs": schemas.ActivityLog,
+    "foods": schemas.FoodItem,
+    "food_logs": schemas.FoodLog,
+    "calendar_notes": schemas.CalendarNote,
+    "calendar_workouts": schemas.CalendarWorkout,
+    "periods": schemas.Period,
+}
+
+SYNC_ROWS = {table: RowSerializer(models.SYNC_MODELS[table], schema) for table, schema in SYNC_SCHEMAS.items()}
+
+def dumps(value) -> bytes:
+    return orjson.dumps(value) if orjson is not None else to_json(value)
+
+# Changes are re-sent for this long after a token was issued, so writes whose
+# transactions committed slightly out of order are not missed. Clients upsert by id.
+SYNC_OVERLAP = timedelta(seconds=30)
+
+@router.get("/sync")
+def sync_changes(
+    user_name: str = Query(..., description="Username to sync"),
+    since: Optional[str] = Query(None, description="Token from the previous sync; omit for a full sync"),
+    db: Session = Depends(get_db)
+):
+    """
+    Return the rows of all user tables changed since the given token, plus deletions.
+    Without a token every row is returned (full sync). Pass the returned token next time.
+    deleted entries with a null id mean every row of that table was cleared for the user.
+    """
+    started_at = datetime.utcnow()
+    changed_after = None
+    if since:
+        try:
+            changed_after = datetime.fromisoformat(since) - SYNC_OVERLAP
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid sync token")
+
+    # Rows go through Core selects and RowSerializer like the other bulk endpoints;
+    # each table's list is encoded once and spliced into the response body
+    changes = []
+    for table, model in models.SYNC_MODELS.items():
+        serializer = SYNC_ROWS[table]
+        stmt = select(*serializer.columns).where(model.user_name == user_name)
+        if changed_after:
+            stmt = stmt.where(model.updated_at > changed_after)
+        rows = db.execute(stmt).mappings().all()
+        if rows:
+            changes.append(dumps(table) + b":" + serializer.dumps(rows))
+
+    deleted = []
+    if changed_after:
+        tombstones = models.DeletedRow.__table__.c
+        deleted = db.execute(
+            select(tombstones.table_name.label("table"), tombstones.row_id.label("id"), tombstones.deleted_at)
+            .where(tombstones.user_name == user_name, tombstones.deleted_at > changed_after)
+            .order_by(tombstones.deleted_at)
+        ).mappings().all()
+
+    content = b"".join([
+        b'{"token":', dumps(started_at.isoformat()),
+        b',"full":', dumps(changed_after is None),
+        b',"changes":{', b",".join(changes),
+        b'},"deleted":', dumps([dict(row) for row in deleted]),
+        b"}",
+    ])
+    return Response(content=content, media_type="application/json")
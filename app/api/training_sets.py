@@ -1,30 +1,221 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List, Optional
+from sqlalchemy import and_, func, insert, select, tuple_
+from typing import List, Optional, Tuple, Iterator
+from datetime import datetime
 from app import models, schemas
-from app.db import get_db
+from app.db import get_db, SessionLocal
+from app.aggregation import date_bucket, bucket_key
+from app.progress import record_new_sets, recompute_progress, clear_progress, rebuild_progress
+from app.sync import record_table_cleared
+from app.serialization import RowSerializer
+from app.chunked_delete import DEFAULT_BATCH_SIZE, delete_user_rows_in_chunks
+from app.jobs import JobContext, job_runner, accepted
+from app.importer import import_training_sets
 from typing import Dict
+import base64
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
 
 router = APIRouter()
 
+TRAINING_SET_ROWS = RowSerializer(models.TrainingSet, schemas.TrainingSet)
+
+def encode_cursor(date: datetime, id: int) -> str:
+    """Encode a (date, id) keyset position as an opaque URL-safe cursor."""
+    raw = f"{date.isoformat()}|{id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor produced by encode_cursor back into (date, id)."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        date_part, id_part = raw.rsplit("|", 1)
+        return datetime.fromisoformat(date_part), int(id_part)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def filter_training_sets(
+    query,
+    user_name: str,
+    exercise_id: Optional[int] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+):
+    """Apply the shared user/exercise/date-range filters to a TrainingSet query or select()."""
+    query = query.filter(models.TrainingSet.user_name == user_name)
+    if exercise_id:
+        query = query.filter(models.TrainingSet.exercise_id == exercise_id)
+    if start_date:
+        query = query.filter(models.TrainingSet.date >= start_date)
+    if end_date:
+        query = query.filter(models.TrainingSet.date <= end_date)
+    return query
+
+def training_sets_page_stmt(
+    user_name: str,
+    exercise_id: Optional[int],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    cursor: Optional[str],
+    limit: int,
+):
+    """Build the keyset-paginated select for one page, ordered by (date, id)."""
+    stmt = filter_training_sets(select(models.TrainingSet), user_name, exercise_id, start_date, end_date)
+    if cursor:
+        last_date, last_id = decode_cursor(cursor)
+        stmt = stmt.filter(
+            tuple_(models.TrainingSet.date, models.TrainingSet.id) > tuple_(last_date, last_id)
+        )
+    # Fetch one extra row to find out whether another page follows
+    return stmt.order_by(models.TrainingSet.date, models.TrainingSet.id).limit(limit + 1)
+
+def build_training_sets_page(rows, limit: int) -> dict:
+    """Turn the limit + 1 rows selected by training_sets_page_stmt into a page with next_cursor."""
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(items[-1].date, items[-1].id)
+    return {"items": items, "next_cursor": next_cursor}
+
+def last_training_dates_stmt(user_name: str):
+    """
+    Select (exercise_name, last_training_date) for every exercise the user has trained.
+    Reads the maintained exercise_progress summaries, one row per exercise, instead of
+    aggregating max(date) over the whole training history.
+    """
+    return (
+        select(
+            models.Exercise.name.label('exercise_name'),
+            models.ExerciseProgress.last_date.label('last_training_date')
+        )
+        .join(models.Exercise, models.ExerciseProgress.exercise_id == models.Exercise.id)
+        .filter(models.ExerciseProgress.user_name == user_name)
+        .order_by(models.ExerciseProgress.last_date)
+    )
+
+def format_last_training_dates(rows) -> Dict[str, str]:
+    """Map exercise names to ISO last training dates."""
+    last_dates = {}
+    for row in rows:
+        # Convert datetime to ISO string format for JSON serialization
+        if row.last_training_date:
+            last_dates[row.exercise_name] = row.last_training_date.isoformat()
+    return last_dates
+
 # =========================
 # TrainingSet Endpoints
 # =========================
 
 @router.get("/training_sets", response_model=List[schemas.TrainingSet])
 def read_training_sets(
+    request: Request,
     user_name: str = Query(..., description="Username to filter sets by"), 
     exercise_id: Optional[int] = Query(None, description="Exercise ID to filter sets by"), 
+    start_date: Optional[datetime] = Query(None, description="Only sets on or after this date"),
+    end_date: Optional[datetime] = Query(None, description="Only sets on or before this date"),
+    format: str = Query("rows", pattern="^(rows|columnar)$", description="rows (list of objects) or columnar (one array per field)"),
     db: Session = Depends(get_db)
 ):
     """
-    List all training sets for a user, optionally filtered by exercise.
+    List all training sets for a user, optionally filtered by exercise and date range.
+    Sent as MessagePack with Accept: application/msgpack.
+    Prefer /training_sets/page for large histories.
     """
-    query = db.query(models.TrainingSet).filter(models.TrainingSet.user_name == user_name)
-    if exercise_id:
-        query = query.filter(models.TrainingSet.exercise_id == exercise_id)
-    return query.all()
+    stmt = filter_training_sets(select(*TRAINING_SET_ROWS.columns), user_name, exercise_id, start_date, end_date)
+    return TRAINING_SET_ROWS.response(db.execute(stmt).mappings().all(), request, format, user_name)
+
+@router.get("/training_sets/page", response_model=schemas.TrainingSetPage)
+def read_training_sets_page(
+    user_name: str = Query(..., description="Username to filter sets by"),
+    exercise_id: Optional[int] = Query(None, description="Exercise ID to filter sets by"),
+    start_date: Optional[datetime] = Query(None, description="Only sets on or after this date"),
+    end_date: Optional[datetime] = Query(None, description="Only sets on or before this date"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(500, ge=1, le=5000, description="Maximum number of sets per page"),
+    db: Session = Depends(get_db)
+):
+    """
+    List training sets one page at a time using keyset pagination on (date, id).
+    Pass the returned next_cursor to fetch the following page; it is null on the last page.
+    Unlike OFFSET paging, each page costs the same no matter how deep into the history it is.
+    """
+    stmt = training_sets_page_stmt(user_name, exercise_id, start_date, end_date, cursor, limit)
+    return build_training_sets_page(db.scalars(stmt).all(), limit)
+
+EXPORT_COLUMNS = [
+    "id", "user_name", "exercise_id", "date", "weight",
+    "repetitions", "set_type", "phase", "myoreps",
+]
+EXPORT_BATCH_SIZE = 1000
+
+def stream_training_sets(
+    export_format: str,
+    user_name: str,
+    exercise_id: Optional[int] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+) -> Iterator[str]:
+    """
+    Yield a user's training sets as NDJSON or CSV text chunks.
+    Rows are read through a server-side cursor EXPORT_BATCH_SIZE at a time,
+    so memory stays flat regardless of how many sets the user has.
+    The generator owns its session because request-scoped dependencies
+    are already closed by the time a streaming body is sent.
+    """
+    columns = [getattr(models.TrainingSet, name) for name in EXPORT_COLUMNS]
+    stmt = filter_training_sets(select(*columns), user_name, exercise_id, start_date, end_date)
+    stmt = stmt.order_by(models.TrainingSet.date, models.TrainingSet.id).execution_options(
+        stream_results=True, yield_per=EXPORT_BATCH_SIZE
+    )
+
+    db = SessionLocal()
+    try:
+        result = db.execute(stmt)
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_COLUMNS)
+            for partition in result.partitions():
+                writer.writerows(
+                    [row.date.isoformat() if name == "date" else row[i] for i, name in enumerate(EXPORT_COLUMNS)]
+                    for row in partition
+                )
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+        else:
+            for partition in result.partitions():
+                yield "".join(
+                    json.dumps(dict(row._mapping), default=datetime.isoformat) + "\n"
+                    for row in partition
+                )
+    finally:
+        db.close()
+
+@router.get("/training_sets/export")
+def export_training_sets(
+    user_name: str = Query(..., description="Username to export sets for"),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="Export format: ndjson or csv"),
+    exercise_id: Optional[int] = Query(None, description="Exercise ID to filter sets by"),
+    start_date: Optional[datetime] = Query(None, description="Only sets on or after this date"),
+    end_date: Optional[datetime] = Query(None, description="Only sets on or before this date"),
+):
+    """
+    Stream a user's complete training history as NDJSON or CSV, ordered by date.
+    """
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        stream_training_sets(format, user_name, exercise_id, start_date, end_date),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="training_sets.{format}"'},
+    )
 
 @router.get("/training_sets/last_dates", response_model=Dict[str, str])
 def read_last_training_dates_per_exercise(
@@ -36,28 +227,101 @@ def read_last_training_dates_per_exercise(
     Returns a dictionary mapping exercise names to their last training dates.
     This endpoint is optimized for performance compared to fetching all training sets.
     """
-    
-    # Optimized query using JOIN and GROUP BY to get last date per exercise
-    query = (
-        db.query(
-            models.Exercise.name.label('exercise_name'),
-            func.max(models.TrainingSet.date).label('last_training_date')
+
+    # One summary row per exercise, maintained by the training set write paths
+    results = db.execute(last_training_dates_stmt(user_name)).all()
+
+    # Convert results to dictionary format expected by the client
+    return format_last_training_dates(results)
+
+@router.get("/training_sets/progress", response_model=List[schemas.ExerciseProgress])
+def read_exercise_progress(
+    user_name: str = Query(..., description="Username to get progress summaries for"),
+    exercise_id: Optional[int] = Query(None, description="Only this exercise"),
+    db: Session = Depends(get_db)
+):
+    """
+    Per-exercise progress: set count, total volume, max weight, best estimated 1RM and last date.
+    Reads the maintained exercise_progress summaries, one row per exercise.
+    """
+    query = db.query(models.ExerciseProgress).filter(models.ExerciseProgress.user_name == user_name)
+    if exercise_id:
+        query = query.filter(models.ExerciseProgress.exercise_id == exercise_id)
+    return query.all()
+
+# Per-muscle intensity columns on models.Exercise
+MUSCLE_GROUPS = [
+    "pectoralis_major", "trapezius", "biceps", "abdominals", "front_delts",
+    "deltoids", "back_delts", "latissimus_dorsi", "triceps", "gluteus_maximus",
+    "hamstrings", "quadriceps", "calves", "forearms",
+]
+
+@router.get("/training_sets/muscle_volume")
+def read_muscle_volume(
+    user_name: str = Query(..., description="Username to compute volume for"),
+    period: str = Query("week", pattern="^(day|week|month)$", description="Bucket size: day, week or month"),
+    start_date: Optional[datetime] = Query(None, description="Only sets on or after this date"),
+    end_date: Optional[datetime] = Query(None, description="Only sets on or before this date"),
+    db: Session = Depends(get_db)
+):
+    """
+    Weekly (or daily/monthly) training volume per muscle group.
+    Each set is weighted by its exercise's intensity coefficient for a muscle:
+    sets[muscle] = sum(coefficient), tonnage[muscle] = sum(weight * repetitions * coefficient).
+    The (set count, tonnage) matrix per bucket and exercise is read from the maintained
+    exercise_volume summaries, or aggregated from the sets in the requested date range;
+    the database then multiplies it with the user's exercise x muscle coefficient matrix
+    and returns one row per bucket.
+    """
+    if start_date or end_date:
+        # Ranges need not align with bucket boundaries, so aggregate the sets of the range
+        bucket = date_bucket(models.TrainingSet.date, period, db.get_bind().dialect.name).label("bucket")
+        source = (
+            filter_training_sets(
+                select(
+                    bucket,
+                    models.TrainingSet.exercise_id,
+                    func.count(models.TrainingSet.id).label("set_count"),
+                    func.sum(models.TrainingSet.weight * models.TrainingSet.repetitions).label("tonnage"),
+                ),
+                user_name, start_date=start_date, end_date=end_date,
+            )
+            .group_by(bucket, models.TrainingSet.exercise_id)
+        )
+    else:
+        volume = models.ExerciseVolume
+        source = (
+            select(volume.bucket, volume.exercise_id, volume.set_count, volume.tonnage)
+            .where(volume.user_name == user_name, volume.period == period)
         )
-        .join(models.Exercise, models.TrainingSet.exercise_id == models.Exercise.id)
-        .filter(models.TrainingSet.user_name == user_name)
-        .group_by(models.Exercise.name, models.Exercise.id)
+    source = source.subquery()
+    coefficients = [getattr(models.Exercise, muscle) for muscle in MUSCLE_GROUPS]
+    stmt = (
+        select(
+            source.c.bucket,
+            *[func.coalesce(func.sum(source.c.set_count * coefficient), 0.0) for coefficient in coefficients],
+            *[func.coalesce(func.sum(source.c.tonnage * coefficient), 0.0) for coefficient in coefficients],
+        )
+        .select_from(source)
+        .outerjoin(models.Exercise, and_(models.Exercise.id == source.c.exercise_id, models.Exercise.user_name == user_name))
+        .group_by(source.c.bucket)
+        .order_by(source.c.bucket)
     )
-    
-    results = query.all()
-    
-    # Convert results to dictionary format expected by the client
-    last_dates = {}
-    for row in results:
-        # Convert datetime to ISO string format for JSON serialization
-        if row.last_training_date:
-            last_dates[row.exercise_name] = row.last_training_date.isoformat()
-    
-    return last_dates
+    muscle_count = len(MUSCLE_GROUPS)
+
+    # Plain floats and strings only, so skip the generic jsonable_encoder pass
+    return JSONResponse({
+        "period": period,
+        "muscles": MUSCLE_GROUPS,
+        "buckets": [
+            {
+                "bucket": bucket_key(row[0]),
+                "sets": {muscle: round(value, 2) for muscle, value in zip(MUSCLE_GROUPS, row[1:1 + muscle_count])},
+                "tonnage": {muscle: round(value, 1) for muscle, value in zip(MUSCLE_GROUPS, row[1 + muscle_count:])},
+            }
+            for row in db.execute(stmt)
+        ],
+    })
 
 @router.get("/training_sets/{id}", response_model=schemas.TrainingSet)
 def read_training_set(id: int, db: Session = Depends(get_db)):
@@ -76,10 +340,54 @@ def create_training_set(ts: schemas.TrainingSetCreate, db: Session = Depends(get
     """
     db_ts = models.TrainingSet(**ts.dict())
     db.add(db_ts)
+    record_new_sets(db, [ts.dict()])
     db.commit()
     db.refresh(db_ts)
     return db_ts
 
+def guess_import_format(file: UploadFile) -> str:
+    """Import format from the file name or content type"""
+    name = (file.filename or "").lower()
+    content_type = file.content_type or ""
+    if name.endswith(".csv") or content_type == "text/csv":
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")) or content_type in ("application/x-ndjson", "application/jsonl"):
+        return "ndjson"
+    raise HTTPException(status_code=400, detail="Cannot tell the file format; pass format=csv or format=ndjson")
+
+def import_training_sets_job(job: JobContext, path: str, format: str, user_name: str) -> dict:
+    try:
+        with SessionLocal() as db, open(path, "rb") as f:
+            return import_training_sets(db, f, format, user_name, on_progress=job.progress)
+    finally:
+        os.remove(path)
+
+@router.post("/training_sets/import")
+def import_training_sets_file(
+    file: UploadFile = File(..., description="CSV file with a header row, or NDJSON file, of training sets"),
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$", description="csv or ndjson; guessed from the file name if omitted"),
+    user_name: Optional[str] = Query(None, description="Import every row for this user, overriding the file's user_name"),
+    background: bool = Query(False, description="Run the import as a background job (202 with the job id)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Import training sets from an uploaded file of any size.
+    Rows are parsed and validated incrementally and loaded in batches (COPY on PostgreSQL);
+    invalid rows are skipped and reported with their line number.
+    Returns the number of imported and failed rows and the first errors.
+    """
+    format = format or guess_import_format(file)
+    if not background:
+        return import_training_sets(db, file.file, format, user_name)
+
+    if not user_name:
+        raise HTTPException(status_code=400, detail="user_name is required for background imports")
+    # The upload is gone once the request ends, so the job reads its own copy
+    with tempfile.NamedTemporaryFile(suffix=f".{format}", delete=False) as copy:
+        shutil.copyfileobj(file.file, copy)
+    job_id = job_runner.submit("import_training_sets", user_name, import_training_sets_job, copy.name, format, user_name)
+    return JSONResponse(status_code=202, content=accepted(job_id, f"Importing training sets of {user_name} in the background"))
+
 @router.post("/training_sets/bulk", response_model=List[schemas.TrainingSet])
 def create_training_sets_bulk(
     training_sets: List[schemas.TrainingSetCreate], 
@@ -105,22 +413,19 @@ def create_training_sets_bulk(
     if len(training_sets) > 1000:  # Reasonable limit to prevent abuse
         raise HTTPException(status_code=400, detail="Cannot create more than 1000 training sets in a single request")
     
-    created_sets = []
-    
     try:
-        # Create all training set objects
-        for ts_data in training_sets:
-            db_ts = models.TrainingSet(**ts_data.dict())
-            db.add(db_ts)
-            created_sets.append(db_ts)
-        
-        # Commit all at once for better performance
+        # Single multi-row INSERT ... RETURNING; the created rows come back
+        # with their IDs, so no per-object refresh is needed afterwards
+        rows = [ts_data.dict() for ts_data in training_sets]
+        created_sets = db.execute(
+            insert(models.TrainingSet.__table__).returning(
+                *models.TrainingSet.__table__.c, sort_by_parameter_order=True
+            ),
+            rows,
+        ).mappings().all()
+        record_new_sets(db, rows)
         db.commit()
         
-        # Refresh all objects to get their IDs
-        for db_ts in created_sets:
-            db.refresh(db_ts)
-        
         return created_sets
         
     except Exception as e:
@@ -139,17 +444,63 @@ def update_training_set(id: int, ts: schemas.TrainingSetCreate, db: Session = De
     db_ts = db.query(models.TrainingSet).filter(models.TrainingSet.id == id).first()
     if not db_ts:
         raise HTTPException(status_code=404, detail="TrainingSet not found")
+    old_key = (db_ts.user_name, db_ts.exercise_id)
     for key, value in ts.dict().items():
         setattr(db_ts, key, value)
+    db.flush()
+    recompute_progress(db, [old_key, (db_ts.user_name, db_ts.exercise_id)])
     db.commit()
     db.refresh(db_ts)
     return db_ts
 
+def clear_training_sets_finalizer(user_name: str):
+    """Bookkeeping committed with the last batch of a chunked clear."""
+    def finalize(batch_db: Session):
+        clear_progress(batch_db, user_name)
+        record_table_cleared(batch_db, user_name, "training_sets")
+    return finalize
+
+def clear_training_sets_job(job: JobContext, user_name: str, batch_size: int) -> dict:
+    with SessionLocal() as db:
+        total = db.query(models.TrainingSet).filter(models.TrainingSet.user_name == user_name).count()
+    job.progress(0, total)
+    deleted = delete_user_rows_in_chunks(
+        models.TrainingSet, user_name, batch_size, clear_training_sets_finalizer(user_name), on_progress=job.progress
+    )
+    return {"deleted": deleted}
+
+def rebuild_progress_job(job: JobContext, user_name: str) -> dict:
+    with SessionLocal() as db:
+        return {"exercises": rebuild_progress(db, user_name)}
+
+@router.post("/training_sets/progress/rebuild", status_code=202, response_model=schemas.JobAccepted)
+def rebuild_training_progress(user_name: str = Query(..., description="Username to rebuild the summaries of")):
+    """
+    Rebuild a user's exercise progress summaries from their training sets as a background job.
+    """
+    job_id = job_runner.submit("rebuild_progress", user_name, rebuild_progress_job, user_name)
+    return accepted(job_id, f"Rebuilding progress summaries of {user_name}")
+
 @router.delete("/training_sets/bulk_clear", response_model=dict)
-def clear_training_sets(user_name: str = Query(...), db: Session = Depends(get_db)):
+def clear_training_sets(
+    user_name: str = Query(...),
+    chunked: bool = Query(False, description="Delete in short batches instead of one long transaction"),
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=100, le=100_000, description="Rows per batch in chunked mode"),
+    background: bool = Query(False, description="Run the chunked delete as a background job (202 with the job id)"),
+    db: Session = Depends(get_db)
+):
     """
     Clear all training sets for a user using efficient bulk delete.
+    For large accounts use chunked=true (and optionally background=true), which deletes
+    in batches of batch_size so no long-running transaction blocks other requests.
     """
+    if background:
+        job_id = job_runner.submit("clear_training_sets", user_name, clear_training_sets_job, user_name, batch_size)
+        return JSONResponse(status_code=202, content=accepted(job_id, f"Clearing training sets of {user_name} in the background"))
+    if chunked:
+        count = delete_user_rows_in_chunks(models.TrainingSet, user_name, batch_size, clear_training_sets_finalizer(user_name))
+        return {"message": f"Cleared {count} training sets"}
+
     # Count first for the response message
     count = db.query(models.TrainingSet).filter(
         models.TrainingSet.user_name == user_name
@@ -159,6 +510,8 @@ def clear_training_sets(user_name: str = Query(...), db: Session = Depends(get_d
     db.query(models.TrainingSet).filter(
         models.TrainingSet.user_name == user_name
     ).delete()
+    clear_progress(db, user_name)
+    record_table_cleared(db, user_name, "training_sets")
     
     db.commit()
     return {"message": f"Cleared {count} training sets"}
@@ -172,5 +525,7 @@ def delete_training_set(id: int, db: Session = Depends(get_db)):
     if not db_ts:
         raise HTTPException(status_code=404, detail="TrainingSet not found")
     db.delete(db_ts)
+    db.flush()
+    recompute_progress(db, [(db_ts.user_name, db_ts.exercise_id)])
     db.commit()
     return {"ok": True}
\ No newline at end of file
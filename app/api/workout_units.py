@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app import models, schemas
 from app.db import get_db
+from app.catalog_versions import bump_version, not_modified
 
 router = APIRouter()
 
@@ -12,16 +13,24 @@ router = APIRouter()
 
 @router.get("/workout_units", response_model=List[schemas.WorkoutUnit])
 def read_workout_units(
+    request: Request,
+    response: Response,
     user_name: str = Query(..., description="Username to filter units by"), 
     workout_id: Optional[int] = Query(None, description="Workout ID to filter units by"), 
     db: Session = Depends(get_db)
 ):
     """
     List all workout units for a user, optionally filtered by workout.
+    Supports If-None-Match with the returned ETag.
     """
+    cached = not_modified(request, response, db, user_name, "workout_units")
+    if cached:
+        return cached
     query = db.query(models.WorkoutUnit).filter(models.WorkoutUnit.user_name == user_name)
     if workout_id:
-        query = query.filter(models.WorkoutUnit.workout_id == workout_id)
+        query = query.filter(models.WorkoutUnit.workout_id == workout_id).order_by(
+            models.WorkoutUnit.position.nulls_last(), models.WorkoutUnit.id
+        )
     return query.all()
 
 @router.get("/workout_units/{id}", response_model=schemas.WorkoutUnit)
@@ -41,6 +50,7 @@ def create_workout_unit(wu: schemas.WorkoutUnitCreate, db: Session = Depends(get
     """
     db_wu = models.WorkoutUnit(**wu.dict())
     db.add(db_wu)
+    bump_version(db, wu.user_name, "workout_units")
     db.commit()
     db.refresh(db_wu)
     return db_wu
@@ -53,6 +63,8 @@ def update_workout_unit(id: int, wu: schemas.WorkoutUnitCreate, db: Session = De
     db_wu = db.query(models.WorkoutUnit).filter(models.WorkoutUnit.id == id).first()
     if not db_wu:
         raise HTTPException(status_code=404, detail="WorkoutUnit not found")
+    for user_name in {db_wu.user_name, wu.user_name}:
+        bump_version(db, user_name, "workout_units")
     for key, value in wu.dict().items():
         setattr(db_wu, key, value)
     db.commit()
@@ -68,5 +80,6 @@ def delete_workout_unit(id: int, db: Session = Depends(get_db)):
     if not db_wu:
         raise HTTPException(status_code=404, detail="WorkoutUnit not found")
     db.delete(db_wu)
+    bump_version(db, db_wu.user_name, "workout_units")
     db.commit()
     return {"ok": True}
\ No newline at end of file
@@ -1,34 +1,140 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import delete, insert, update
+from typing import List, Optional, Set
 from app import models, schemas
 from app.db import get_db
+from app.catalog_versions import bump_version, not_modified
+from app.sync import record_deleted_rows
 
 router = APIRouter()
 
+WORKOUT_INCLUDES = {"units", "exercise"}
+
+def parse_include(include: Optional[str]) -> Set[str]:
+    """Parse the comma-separated include parameter; exercise implies units."""
+    if not include:
+        return set()
+    parts = {part.strip() for part in include.split(",") if part.strip()}
+    unknown = parts - WORKOUT_INCLUDES
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown include: {', '.join(sorted(unknown))}")
+    if "exercise" in parts:
+        parts.add("units")
+    return parts
+
+def workouts_query(db: Session, includes: Set[str]):
+    """Workout query eager-loading the included relations with one SELECT ... IN per level."""
+    query = db.query(models.Workout)
+    if "exercise" in includes:
+        query = query.options(selectinload(models.Workout.workout_units).selectinload(models.WorkoutUnit.exercise))
+    elif "units" in includes:
+        query = query.options(selectinload(models.Workout.workout_units))
+    return query
+
+def workout_detail(workout: models.Workout, includes: Set[str]) -> dict:
+    """Serialize a workout with only the included relations, so nothing is lazy-loaded."""
+    data = schemas.Workout.model_validate(workout, from_attributes=True).dict()
+    if "units" in includes:
+        units = []
+        for unit in workout.workout_units:
+            unit_data = schemas.WorkoutUnit.model_validate(unit, from_attributes=True).dict()
+            if "exercise" in includes:
+                unit_data["exercise"] = schemas.Exercise.model_validate(unit.exercise, from_attributes=True)
+            units.append(unit_data)
+        data["workout_units"] = units
+    return data
+
+def save_workout_plan(db: Session, workout: models.Workout, plan: schemas.WorkoutPlan):
+    """
+    Make the workout's units match the plan with one set-based statement per kind of change:
+    units without an id are inserted, units with an id are updated and
+    existing units missing from the plan are deleted. Each unit's position
+    is set to its index in the plan. Does not commit.
+    """
+    previous_user_name = workout.user_name
+    existing_ids = {
+        unit_id for (unit_id,) in
+        db.query(models.WorkoutUnit.id).filter(models.WorkoutUnit.workout_id == workout.id)
+    }
+    plan_ids = [unit.id for unit in plan.units if unit.id is not None]
+    unknown = set(plan_ids) - existing_ids
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Units {sorted(unknown)} do not belong to this workout")
+    if len(plan_ids) != len(set(plan_ids)):
+        raise HTTPException(status_code=400, detail="A unit id appears more than once")
+
+    removed_ids = existing_ids - set(plan_ids)
+    if removed_ids:
+        db.execute(delete(models.WorkoutUnit).where(models.WorkoutUnit.id.in_(removed_ids)))
+        record_deleted_rows(db, previous_user_name, "workout_units", removed_ids)
+    if previous_user_name != plan.user_name and plan_ids:
+        # The kept units move to the new owner; the previous owner's clients must drop them
+        record_deleted_rows(db, previous_user_name, "workout_units", plan_ids)
+
+    updates = [
+        {**unit.dict(), "user_name": plan.user_name, "workout_id": workout.id, "position": position}
+        for position, unit in enumerate(plan.units) if unit.id is not None
+    ]
+    if updates:
+        db.execute(update(models.WorkoutUnit), updates)
+
+    inserts = [
+        {**unit.dict(exclude={"id"}), "user_name": plan.user_name, "workout_id": workout.id, "position": position}
+        for position, unit in enumerate(plan.units) if unit.id is None
+    ]
+    if inserts:
+        db.execute(insert(models.WorkoutUnit.__table__), inserts)
+
+    for user_name in {previous_user_name, plan.user_name}:
+        bump_version(db, user_name, "workouts", "workout_units")
+    workout.user_name = plan.user_name
+    workout.name = plan.name
+
 # =========================
 # Workout Endpoints
 # =========================
 
-@router.get("/workouts", response_model=List[schemas.Workout])
+@router.get("/workouts", response_model=List[schemas.WorkoutDetail], response_model_exclude_unset=True)
 def read_workouts(
+    request: Request,
+    response: Response,
     user_name: str = Query(..., description="Username to filter workouts by"),
+    include: Optional[str] = Query(None, description="Comma-separated relations to embed: units, exercise"),
     db: Session = Depends(get_db)
 ):
     """
     List all workouts for a user.
+    include=units embeds each workout's units, include=units,exercise also each unit's exercise;
+    the whole plan is loaded in at most three queries.
+    Supports If-None-Match with the returned ETag.
     """
-    return db.query(models.Workout).filter(models.Workout.user_name == user_name).all()
+    includes = parse_include(include)
+    tables = ["workouts"]
+    if "units" in includes:
+        tables.append("workout_units")
+    if "exercise" in includes:
+        tables.append("exercises")
+    cached = not_modified(request, response, db, user_name, *tables)
+    if cached:
+        return cached
+    workouts = workouts_query(db, includes).filter(models.Workout.user_name == user_name).all()
+    return [workout_detail(w, includes) for w in workouts]
 
-@router.get("/workouts/{id}", response_model=schemas.Workout)
-def read_workout(id: int, db: Session = Depends(get_db)):
+@router.get("/workouts/{id}", response_model=schemas.WorkoutDetail, response_model_exclude_unset=True)
+def read_workout(
+    id: int,
+    include: Optional[str] = Query(None, description="Comma-separated relations to embed: units, exercise"),
+    db: Session = Depends(get_db)
+):
     """
-    Get a single workout by its ID.
+    Get a single workout by its ID, optionally with its units and their exercises.
     """
-    workout = db.query(models.Workout).filter(models.Workout.id == id).first()
+    includes = parse_include(include)
+    workout = workouts_query(db, includes).filter(models.Workout.id == id).first()
     if not workout:
         raise HTTPException(status_code=404, detail="Workout not found")
-    return workout
+    return workout_detail(workout, includes)
 
 @router.post("/workouts", response_model=schemas.Workout)
 def create_workout(workout: schemas.WorkoutCreate, db: Session = Depends(get_db)):
@@ -37,10 +143,36 @@ def create_workout(workout: schemas.WorkoutCreate, db: Session = Depends(get_db)
     """
     db_workout = models.Workout(**workout.dict())
     db.add(db_workout)
+    bump_version(db, workout.user_name, "workouts")
     db.commit()
     db.refresh(db_workout)
     return db_workout
 
+@router.post("/workouts/plan", response_model=schemas.WorkoutDetail, response_model_exclude_unset=True)
+def create_workout_plan(plan: schemas.WorkoutPlan, db: Session = Depends(get_db)):
+    """
+    Create a workout together with all of its units in one transaction.
+    """
+    db_workout = models.Workout(user_name=plan.user_name, name=plan.name)
+    db.add(db_workout)
+    db.flush()
+    save_workout_plan(db, db_workout, plan)
+    db.commit()
+    return read_workout(db_workout.id, "units", db)
+
+@router.put("/workouts/{id}/plan", response_model=schemas.WorkoutDetail, response_model_exclude_unset=True)
+def replace_workout_plan(id: int, plan: schemas.WorkoutPlan, db: Session = Depends(get_db)):
+    """
+    Replace a workout and its units in one transaction, diffing against the stored units.
+    Units are stored and returned in the order of the plan.
+    """
+    db_workout = db.query(models.Workout).filter(models.Workout.id == id).first()
+    if not db_workout:
+        raise HTTPException(status_code=404, detail="Workout not found")
+    save_workout_plan(db, db_workout, plan)
+    db.commit()
+    return read_workout(id, "units", db)
+
 @router.put("/workouts/{id}", response_model=schemas.Workout)
 def update_workout(id: int, workout: schemas.WorkoutCreate, db: Session = Depends(get_db)):
     """
@@ -49,6 +181,8 @@ def update_workout(id: int, workout: schemas.WorkoutCreate, db: Session = Depend
     db_workout = db.query(models.Workout).filter(models.Workout.id == id).first()
     if not db_workout:
         raise HTTPException(status_code=404, detail="Workout not found")
+    for user_name in {db_workout.user_name, workout.user_name}:
+        bump_version(db, user_name, "workouts")
     for key, value in workout.dict().items():
         setattr(db_workout, key, value)
     db.commit()
@@ -64,5 +198,7 @@ def delete_workout(id: int, db: Session = Depends(get_db)):
     if not db_workout:
         raise HTTPException(status_code=404, detail="Workout not found")
     db.delete(db_workout)
+    # The units are deleted along with the workout (delete-orphan cascade)
+    bump_version(db, db_workout.user_name, "workouts", "workout_units")
     db.commit()
     return {"ok": True}
\ No newline at end of file
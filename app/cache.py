@@ -0,0 +1,203 @@
+"""
+In-process cache of per-user catalogs (exercises, activities).
+
+Each gunicorn worker keeps its own bounded LRU cache with a TTL. An entry
+stores the catalog_versions counter it was loaded at, and readers pass the
+version they just read from the database: a mismatch reloads the entry, so
+a write committed by any worker is never served stale under its new ETag.
+
+The write handlers also invalidate the user's entry after committing and
+publish the invalidation on a pluggable channel, so the other workers free
+their copy instead of keeping it until it expires:
+
+- "local" (default): no cross-worker messages, other workers reload on the version mismatch
+- "postgres": LISTEN/NOTIFY on the application database
+
+Configured through the environment:
+
+    CATALOG_CACHE_TTL            seconds an entry stays valid (default 60, 0 disables the cache)
+    CATALOG_CACHE_MAX_ENTRIES    max cached (table, user) catalogs per worker (default 1024)
+    CATALOG_CACHE_CHANNEL        local | postgres
+"""
+import logging
+import os
+import select
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after ttl seconds."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Return the cached value or None (counted as a miss)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+class LocalChannel:
+    """Invalidation channel that stays within the current worker."""
+
+    def publish(self, key: str):
+        pass
+
+    def start(self, on_message):
+        pass
+
+    def stop(self):
+        pass
+
+class PostgresNotifyChannel:
+    """
+    Invalidation channel over PostgreSQL LISTEN/NOTIFY.
+    A daemon thread per worker listens on a dedicated connection and calls
+    on_message(key) for every notification, reconnecting on errors.
+    """
+
+    def __init__(self, engine, channel: str = "gymli_catalog_cache"):
+        self.engine = engine
+        self.channel = channel
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def publish(self, key: str):
+        with self.engine.connect() as conn:
+            conn.execute(text("SELECT pg_notify(:channel, :key)"), {"channel": self.channel, "key": key})
+            conn.commit()
+
+    def start(self, on_message):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._listen, args=(on_message,), name="catalog-cache-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _listen(self, on_message):
+        while not self._stopped.is_set():
+            raw = None
+            try:
+                raw = self.engine.raw_connection()
+                conn = raw.driver_connection
+                conn.autocommit = True
+                conn.cursor().execute(f'LISTEN "{self.channel}"')
+                while not self._stopped.is_set():
+                    if select.select([conn], [], [], 5.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        on_message(conn.notifies.pop(0).payload)
+            except Exception:
+                logger.exception("Catalog cache listener failed, reconnecting")
+                time.sleep(5)
+            finally:
+                if raw is not None:
+                    raw.invalidate()
+
+class CatalogCache:
+    """Per-user catalog cache keyed by (table, user_name), with cross-worker invalidation."""
+
+    def __init__(self, cache: TTLCache, channel=None):
+        self.cache = cache
+        self.channel = channel or LocalChannel()
+
+    @staticmethod
+    def _key(table: str, user_name: str) -> str:
+        return f"{table}:{user_name}"
+
+    def get_or_load(self, table: str, user_name: str, version: int, loader):
+        """
+        Return the catalog cached at the given version of the table, calling
+        loader() and caching its result on a miss or a version mismatch.
+        Read version before calling, so the loaded rows are at least that recent.
+        """
+        key = self._key(table, user_name)
+        entry = self.cache.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        value = loader()
+        self.cache.set(key, (version, value))
+        return value
+
+    def invalidate(self, table: str, user_name: str):
+        """Drop the user's catalog here and in the other workers. Call it after the write's commit."""
+        key = self._key(table, user_name)
+        self.cache.invalidate(key)
+        try:
+            self.channel.publish(key)
+        except Exception:
+            logger.exception("Failed to publish cache invalidation for %s", key)
+
+    def start(self):
+        self.channel.start(self.cache.invalidate)
+
+    def stop(self):
+        self.channel.stop()
+
+    def stats(self) -> dict:
+        return {"channel": type(self.channel).__name__, **self.cache.stats()}
+
+def build_catalog_cache() -> CatalogCache:
+    cache = TTLCache(
+        max_entries=int(os.getenv("CATALOG_CACHE_MAX_ENTRIES", "1024")),
+        ttl=float(os.getenv("CATALOG_CACHE_TTL", "60")),
+    )
+    channel = None
+    if os.getenv("CATALOG_CACHE_CHANNEL", "local") == "postgres":
+        from app.db import engine
+        channel = PostgresNotifyChannel(engine)
+    return CatalogCache(cache, channel)
+
+catalog_cache = build_catalog_cache()
@@ -0,0 +1,62 @@
+"""
+Per-user, per-table version counters used as ETags for the catalog endpoints.
+
+Every write path of a catalog table bumps the user's counter for that table
+in the same transaction. List endpoints send the counter as an ETag and
+answer a matching If-None-Match with 304 Not Modified, before running the
+list query or serializing anything.
+
+Counters are per user, so two users can be at the same version of a table.
+The ETag therefore carries a hash of the user name as well; otherwise a
+shared cache or a client switching accounts could revalidate one user's
+copy with another user's tag.
+"""
+import hashlib
+from typing import Optional, Union
+from fastapi import Request, Response
+from sqlalchemy.orm import Session
+from app import models
+from app.db import upsert_insert
+
+def bump_version(db: Session, user_name: str, *tables: str):
+    """Increment the user's version of each table. Does not commit; call it before the write's commit."""
+    version_table = models.CatalogVersion.__table__
+    upsert = upsert_insert(db)
+    for table in tables:
+        if upsert is not None:
+            stmt = upsert(version_table).values(user_name=user_name, table_name=table, version=1)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[version_table.c.user_name, version_table.c.table_name],
+                set_={"version": version_table.c.version + 1},
+            )
+            db.execute(stmt)
+            continue
+        row = db.get(models.CatalogVersion, (user_name, table))
+        if row:
+            row.version += 1
+        else:
+            db.add(models.CatalogVersion(user_name=user_name, table_name=table, version=1))
+
+def current_version(db: Session, user_name: str, table: str) -> int:
+    """The user's current version of a table, 0 if it was never written through the API."""
+    row = db.get(models.CatalogVersion, (user_name, table))
+    return row.version if row else 0
+
+def make_etag(table: str, user_name: str, version: Union[int, str]) -> str:
+    # Hashed, because user names may contain characters not allowed in an ETag
+    user_hash = hashlib.sha256(user_name.encode()).hexdigest()[:16]
+    return f'W/"{table}-{user_hash}-{version}"'
+
+def not_modified(request: Request, response: Response, db: Session, user_name: str, *tables: str) -> Optional[Response]:
+    """
+    Compare If-None-Match with the current version of the table(s) the response is built from.
+    Returns a 304 response to send as-is when the client copy is current;
+    otherwise sets the ETag on the outgoing response and returns None.
+    """
+    versions = ".".join(str(current_version(db, user_name, table)) for table in tables)
+    etag = make_etag("+".join(tables), user_name, versions)
+    client_tags = [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]
+    if etag in client_tags or "*" in client_tags:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
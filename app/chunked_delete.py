@@ -0,0 +1,62 @@
+"""
+Chunked deletion of all of a user's rows in a table.
+
+A single DELETE of a large account holds its row locks and grows the WAL for
+one long transaction. delete_user_rows_in_chunks() instead removes the rows
+in batches of batch_size, each batch a short transaction of its own
+(DELETE ... WHERE id IN (SELECT ... LIMIT n) RETURNING id), so other requests
+only ever wait for one batch. Progress is reported after every batch.
+
+It opens its own sessions, so it can also run after the response was sent
+(as a background job on app.jobs.job_runner). The bookkeeping that must accompany the wipe
+(progress summaries, sync tombstones, catalog versions) is passed in as
+finalize(db) and committed together with the last batch.
+"""
+import logging
+import time
+from typing import Callable, Optional
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from app.db import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 5000
+
+def log_progress(table: str, user_name: str, deleted: int):
+    logger.info("Clearing %s of %s: %d rows deleted", table, user_name, deleted)
+
+def delete_user_rows_in_chunks(
+    model,
+    user_name: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    finalize: Optional[Callable[[Session], None]] = None,
+    on_progress: Optional[Callable[[int], None]] = None,
+    pause_seconds: float = 0.0,
+) -> int:
+    """Delete every row of model belonging to user_name in bounded batches. Returns the number deleted."""
+    table = model.__table__
+    if on_progress is None:
+        on_progress = lambda deleted: log_progress(table.name, user_name, deleted)
+
+    total = 0
+    while True:
+        with SessionLocal() as db:
+            batch = (
+                select(table.c.id)
+                .where(table.c.user_name == user_name)
+                .order_by(table.c.id)
+                .limit(batch_size)
+                .scalar_subquery()
+            )
+            deleted = len(db.execute(delete(table).where(table.c.id.in_(batch)).returning(table.c.id)).all())
+            last_batch = deleted < batch_size
+            if last_batch and finalize is not None:
+                finalize(db)
+            db.commit()
+        total += deleted
+        on_progress(total)
+        if last_batch:
+            return total
+        if pause_seconds:
+            time.sleep(pause_seconds)
@@ -12,7 +12,12 @@ DB_PASSWORD = os.getenv("DATABASE_PASSWORD")
 DB_HOST = os.getenv("DATABASE_HOST")
 DB_NAME = os.getenv("DATABASE_NAME")
 
-DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}?sslmode=require"
+# DATABASE_URL / ASYNC_DATABASE_URL override the URLs built from the parts above (e.g. for a local database)
+DATABASE_URL = os.getenv("DATABASE_URL") or f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}?sslmode=require"
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}?ssl=require"
+
+# Set DATABASE_ASYNC=true to serve the read-heavy history endpoints from async handlers (see app/api/async_history.py)
+ASYNC_ENABLED = os.getenv("DATABASE_ASYNC", "false").lower() in ("1", "true", "yes")
 
 # SQLAlchemy setup
 engine = create_engine(DATABASE_URL)
@@ -24,4 +29,30 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def upsert_insert(db: Session):
+    """Return the dialect's insert() construct supporting on_conflict_do_update, or None if unavailable."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    return None
+
+# Async SQLAlchemy setup, only created when enabled so the sync-only deployment doesn't need asyncpg
+async_engine = None
+AsyncSessionLocal = None
+if ASYNC_ENABLED:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    async_engine = create_async_engine(ASYNC_DATABASE_URL)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+async def get_async_db():
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async database mode is disabled; set DATABASE_ASYNC=true")
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,165 @@
+"""
+Streaming import of training sets from CSV or NDJSON files.
+
+The file is read record by record and handled in batches of
+IMPORT_BATCH_SIZE, so memory stays constant regardless of its size:
+
+1. each record is validated against schemas.TrainingSetCreate; invalid ones
+   are skipped and reported with their line number
+2. the batch's exercise_ids are checked with one query; rows referencing
+   an unknown exercise are skipped and reported with their line number
+3. the remaining rows are loaded with COPY FROM STDIN on PostgreSQL, or a
+   batched executemany INSERT elsewhere
+4. the batch is folded into the progress summaries and committed
+
+A batch the database still rejects (e.g. an exercise deleted meanwhile)
+is rolled back and reported as a line range; earlier batches stay imported.
+
+CSV files need a header row with the TrainingSetCreate field names; empty
+cells are read as null. NDJSON files have one JSON object per line.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Callable, Iterator, Optional, Tuple
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+from app import models, schemas
+from app.progress import record_new_sets
+
+IMPORT_BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 100
+IMPORT_FORMATS = ("csv", "ndjson")
+
+# Columns written by COPY; updated_at has a Python-side default that COPY would skip
+COPY_COLUMNS = list(schemas.TrainingSetCreate.model_fields) + ["updated_at"]
+
+def iter_records(fileobj, format: str) -> Iterator[Tuple[int, object]]:
+    """Yield (line number, record dict) from a binary file; unparsable lines yield the exception instead."""
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    try:
+        if format == "csv":
+            reader = csv.DictReader(text)
+            for record in reader:
+                yield reader.line_num, {key: (value if value != "" else None) for key, value in record.items()}
+        else:
+            for line_num, line in enumerate(text, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_num, json.loads(line)
+                except ValueError as e:
+                    yield line_num, e
+    finally:
+        # Leave the underlying file open for the caller
+        text.detach()
+
+def copy_rows(db: Session, rows):
+    """Load rows into training_sets with PostgreSQL's COPY FROM STDIN, inside the session's transaction."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    now = datetime.utcnow().isoformat()
+    for row in rows:
+        writer.writerow([
+            "" if row[column] is None else row[column].isoformat() if isinstance(row[column], datetime) else row[column]
+            for column in COPY_COLUMNS[:-1]
+        ] + [now])
+    buffer.seek(0)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY training_sets ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+class ImportReport:
+    def __init__(self):
+        self.imported = 0
+        self.failed = 0
+        self.batches = 0
+        self.errors = []
+
+    def error(self, line: str, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    def as_dict(self) -> dict:
+        return {
+            "imported": self.imported,
+            "failed": self.failed,
+            "batches": self.batches,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+def import_training_sets(
+    db: Session,
+    fileobj,
+    format: str,
+    user_name: Optional[str] = None,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    on_progress: Optional[Callable[[int], None]] = None,
+) -> dict:
+    """
+    Import the training sets of a CSV / NDJSON file, committing batch by batch.
+    user_name, if given, overrides the user of every row. Returns the import report.
+    """
+    report = ImportReport()
+    use_copy = db.get_bind().dialect.name == "postgresql"
+
+    def flush(batch):
+        exercise_ids = {row["exercise_id"] for _, row in batch}
+        known = set(db.scalars(select(models.Exercise.id).where(models.Exercise.id.in_(exercise_ids))))
+        if len(known) < len(exercise_ids):
+            for line_num, row in batch:
+                if row["exercise_id"] not in known:
+                    report.error(str(line_num), f"Unknown exercise_id {row['exercise_id']}")
+            batch = [(line_num, row) for line_num, row in batch if row["exercise_id"] in known]
+        report.batches += 1
+        if batch:
+            first_line, last_line = batch[0][0], batch[-1][0]
+            rows = [row for _, row in batch]
+            try:
+                if use_copy:
+                    copy_rows(db, rows)
+                else:
+                    now = datetime.utcnow()
+                    db.execute(insert(models.TrainingSet.__table__), [{**row, "updated_at": now} for row in rows])
+                record_new_sets(db, rows)
+                db.commit()
+                report.imported += len(rows)
+            except Exception as e:
+                db.rollback()
+                report.failed += len(rows)
+                if len(report.errors) < MAX_REPORTED_ERRORS:
+                    report.errors.append({"line": f"{first_line}-{last_line}", "error": str(getattr(e, "orig", e)).strip()})
+        if on_progress is not None:
+            on_progress(report.imported)
+
+    batch = []
+    for line_num, record in iter_records(fileobj, format):
+        if isinstance(record, Exception):
+            report.error(str(line_num), f"Invalid JSON: {record}")
+            continue
+        if not isinstance(record, dict):
+            report.error(str(line_num), "Expected an object")
+            continue
+        if user_name is not None:
+            record["user_name"] = user_name
+        try:
+            row = schemas.TrainingSetCreate.model_validate(record).dict()
+        except ValidationError as e:
+            report.error(str(line_num), e.errors(include_url=False, include_context=False, include_input=False))
+            continue
+        batch.append((line_num, row))
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+    return report.as_dict()
@@ -0,0 +1,227 @@
+"""
+In-process background jobs.
+
+Heavy operations (account clears, progress rebuilds, imports) are submitted
+as jobs instead of running inside the request: the handler answers
+202 Accepted with the job id and the client polls GET /jobs/{id}.
+
+Each gunicorn worker runs its jobs on a small thread pool. The job rows
+(state, progress, result, error) live in the jobs table, so any worker can
+answer the polling requests. Configured through the environment:
+
+    JOBS_MAX_WORKERS         threads per worker process running jobs (default 2)
+    JOBS_MAX_QUEUED          jobs a worker accepts before answering 503 (default 100)
+    JOBS_SHUTDOWN_TIMEOUT    seconds a stopping worker waits for its running jobs
+                             (default 25, below gunicorn's graceful_timeout of 30)
+    JOBS_STALE_AFTER         seconds after which a running job of another host is
+                             considered lost (default 21600)
+
+A job function receives a JobContext as its first argument, reports
+progress through it and returns a JSON-serializable result.
+
+When a worker shuts down, its queued jobs are marked failed and its running
+jobs get up to JOBS_SHUTDOWN_TIMEOUT to record their own outcome; those
+still running then are marked interrupted, keeping their progress, and may
+still record an outcome if they finish before the process exits. Jobs of a
+worker that died without shutting down (SIGKILL, OOM) are failed by the
+sweep each worker runs at startup: on the same host when their process is
+gone, elsewhere once they started more than JOBS_STALE_AFTER ago.
+"""
+import json
+import logging
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+from fastapi import HTTPException
+from app import models
+from app.db import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# States of a job whose outcome is not recorded yet; succeeded and failed are final.
+# interrupted: the worker stopped while the job ran, it may still record an outcome.
+ACTIVE_STATES = ("queued", "running", "interrupted")
+
+def process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class JobContext:
+    """Handed to a running job to report its progress."""
+
+    def __init__(self, job_id: int):
+        self.job_id = job_id
+
+    def progress(self, done: int, total: Optional[int] = None):
+        values = {"progress": done}
+        if total is not None:
+            values["total"] = total
+        with SessionLocal() as db:
+            db.query(models.Job).filter(models.Job.id == self.job_id).update(values)
+            db.commit()
+
+class JobRunner:
+    def __init__(self, max_workers: int = 2, max_queued: int = 100, shutdown_timeout: float = 25.0, stale_after: float = 21600.0):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.shutdown_timeout = shutdown_timeout
+        self.stale_after = stale_after
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+        self._executor = None
+        self._pending = 0
+        self._running = 0
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+
+    def submit(self, kind: str, user_name: str, func: Callable, *args, **kwargs) -> int:
+        """Persist a queued job for func(ctx, *args, **kwargs) and schedule it. Returns the job id."""
+        with self._lock:
+            if self._pending >= self.max_queued:
+                raise HTTPException(status_code=503, detail="Too many background jobs queued, try again later")
+            self._pending += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+        try:
+            with SessionLocal() as db:
+                job = models.Job(user_name=user_name, kind=kind, state="queued", progress=0, worker=self.worker)
+                db.add(job)
+                db.commit()
+                job_id = job.id
+            self._executor.submit(self._run, job_id, func, args, kwargs)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        return job_id
+
+    def _finish(self, job_id: int, **values):
+        """Record the outcome, unless the job already ended (e.g. failed by the startup sweep)."""
+        with SessionLocal() as db:
+            db.query(models.Job).filter(
+                models.Job.id == job_id,
+                models.Job.state.in_(ACTIVE_STATES),
+            ).update({**values, "finished_at": datetime.utcnow()})
+            db.commit()
+
+    def _run(self, job_id: int, func: Callable, args, kwargs):
+        running = False
+        try:
+            with SessionLocal() as db:
+                started = db.query(models.Job).filter(
+                    models.Job.id == job_id,
+                    models.Job.state == "queued",
+                ).update({"state": "running", "started_at": datetime.utcnow()})
+                db.commit()
+            if not started:
+                # Already ended, e.g. marked failed by shutdown() before it got a thread
+                return
+            # Counted as running until the outcome is recorded, which shutdown() waits for
+            with self._lock:
+                self._running += 1
+                running = True
+            result = func(JobContext(job_id), *args, **kwargs)
+            self._finish(job_id, state="succeeded", error=None, result=json.dumps(result, default=str))
+        except Exception as e:
+            logger.exception("Job %s failed", job_id)
+            try:
+                self._finish(job_id, state="failed", error=str(e))
+            except Exception:
+                logger.exception("Could not record the failure of job %s", job_id)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                if running:
+                    self._running -= 1
+                    self._idle.notify_all()
+
+    def shutdown(self):
+        """
+        Stop taking jobs: fail the queued ones, give the running ones up to
+        shutdown_timeout to finish and mark those still running as interrupted.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._mark(["queued"], "failed", "Not started before server shutdown")
+        with self._lock:
+            self._idle.wait_for(lambda: self._running == 0, timeout=self.shutdown_timeout)
+        self._mark(["running"], "interrupted", "Server shut down while the job was running; it may still finish")
+
+    def _mark(self, states, state: str, error: str):
+        """Move this worker's jobs in the given states to state, keeping their progress."""
+        values = {"state": state, "error": error}
+        if state != "interrupted":
+            values["finished_at"] = datetime.utcnow()
+        try:
+            with SessionLocal() as db:
+                db.query(models.Job).filter(
+                    models.Job.worker == self.worker,
+                    models.Job.state.in_(states),
+                ).update(values, synchronize_session=False)
+                db.commit()
+        except Exception:
+            logger.exception("Could not mark %s jobs as %s", "/".join(states), state)
+
+    def worker_alive(self, worker: Optional[str], started_at: Optional[datetime], now: datetime) -> bool:
+        """Whether the process that owns a job may still run it."""
+        host, _, pid = (worker or "").rpartition(":")
+        if worker == self.worker:
+            # An earlier process with our pid; this one has not run anything yet
+            return False
+        if host == socket.gethostname() and pid.isdigit():
+            return process_alive(int(pid))
+        return started_at is None or now - started_at < timedelta(seconds=self.stale_after)
+
+    def reap_stale_jobs(self) -> int:
+        """Fail the unfinished jobs of workers that died without shutting down. Run at startup."""
+        now = datetime.utcnow()
+        try:
+            with SessionLocal() as db:
+                lost = [
+                    job.id for job in db.query(models.Job).filter(models.Job.state.in_(ACTIVE_STATES))
+                    if not self.worker_alive(job.worker, job.started_at or job.created_at, now)
+                ]
+                if lost:
+                    db.query(models.Job).filter(
+                        models.Job.id.in_(lost),
+                        models.Job.state.in_(ACTIVE_STATES),
+                    ).update(
+                        {"state": "failed", "error": "The worker running the job stopped unexpectedly", "finished_at": now},
+                        synchronize_session=False,
+                    )
+                    db.commit()
+                    logger.warning("Failed %d jobs of stopped workers: %s", len(lost), lost)
+                return len(lost)
+        except Exception:
+            logger.exception("Could not reap stale jobs")
+            return 0
+
+    def stats(self) -> dict:
+        return {
+            "worker": self.worker, "max_workers": self.max_workers, "max_queued": self.max_queued,
+            "pending": self._pending, "running": self._running,
+        }
+
+def job_to_dict(job: models.Job) -> dict:
+    """Job row as the /jobs response, with the stored JSON result decoded."""
+    data = {column.name: getattr(job, column.name) for column in models.Job.__table__.columns}
+    data["result"] = json.loads(job.result) if job.result else None
+    return data
+
+def accepted(job_id: int, message: str) -> dict:
+    """Body of the 202 response of an endpoint that submitted a job."""
+    return {"message": message, "job_id": job_id, "status_url": f"/jobs/{job_id}"}
+
+job_runner = JobRunner(
+    max_workers=int(os.getenv("JOBS_MAX_WORKERS", "2")),
+    max_queued=int(os.getenv("JOBS_MAX_QUEUED", "100")),
+    shutdown_timeout=float(os.getenv("JOBS_SHUTDOWN_TIMEOUT", "25")),
+    stale_after=float(os.getenv("JOBS_STALE_AFTER", "21600")),
+)
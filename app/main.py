@@ -1,17 +1,40 @@
-from fastapi import FastAPI, HTTPException, Depends, Header
-from app.api import activities, animals, exercises, training_sets, workouts, workout_units, food, calendar_note, calendar_workout, period
+from fastapi import FastAPI, HTTPException, Depends, Header, Response
+from app.api import activities, animals, exercises, training_sets, workouts, workout_units, food, calendar_note, calendar_workout, period, sync, bootstrap, jobs
 from fastapi.middleware.cors import CORSMiddleware
+from app.db import ASYNC_ENABLED, engine, async_engine
+from app.cache import catalog_cache
+from app.jobs import job_runner
+from app.metrics import PrometheusMiddleware, instrument_pool, render_metrics
+from app.query_stats import QueryStatsMiddleware, instrument_queries
+from contextlib import asynccontextmanager
 import os
 
-app = FastAPI(title="Gymli API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start listening for cross-worker cache invalidations
+    catalog_cache.start()
+    # Fail the jobs left unfinished by workers that were killed
+    job_runner.reap_stale_jobs()
+    yield
+    catalog_cache.stop()
+    job_runner.shutdown()
+
+app = FastAPI(title="Gymli API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["https://icy-ground-0e9ef4303.6.azurestaticapps.net", "https://gymli.brgmnn.de", "http://localhost:3000"],
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH"], 
-    allow_headers=["Content-Type", "Authorization", "Accept", "X-API-Key"],  
+    allow_headers=["Content-Type", "Authorization", "Accept", "X-API-Key", "If-None-Match"],  
+    expose_headers=["ETag", "Server-Timing"],
 )
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(PrometheusMiddleware)
+instrument_pool(engine)
+instrument_queries(engine)
+if async_engine is not None:
+    instrument_queries(async_engine.sync_engine)
 
 API_KEY = os.getenv("API_KEY")
 if not API_KEY:
@@ -22,6 +45,11 @@ async def verify_api_key(x_api_key: str = Header(...)):
         raise HTTPException(status_code=401, detail="Invalid API key")
     return x_api_key
 
+# Async history routers go first so they take precedence over the sync ones for the same paths
+if ASYNC_ENABLED:
+    from app.api import async_history
+    app.include_router(async_history.router, dependencies=[Depends(verify_api_key)])
+
 # Include all routers
 app.include_router(animals.router, dependencies=[Depends(verify_api_key)])
 app.include_router(exercises.router, dependencies=[Depends(verify_api_key)])
@@ -33,6 +61,9 @@ app.include_router(food.router, dependencies=[Depends(verify_api_key)])
 app.include_router(calendar_note.router, dependencies=[Depends(verify_api_key)])
 app.include_router(calendar_workout.router, dependencies=[Depends(verify_api_key)])
 app.include_router(period.router, dependencies=[Depends(verify_api_key)])
+app.include_router(sync.router, dependencies=[Depends(verify_api_key)])
+app.include_router(bootstrap.router, dependencies=[Depends(verify_api_key)])
+app.include_router(jobs.router, dependencies=[Depends(verify_api_key)])
 
 @app.get("/")
 def read_root():
@@ -43,3 +74,15 @@ def read_root():
 def health_check():
     return {"status": "healthy"}
 
+
+@app.get("/cache/stats", dependencies=[Depends(verify_api_key)])
+def cache_stats():
+    """Hit/miss counters of this worker's catalog cache."""
+    return catalog_cache.stats()
+
+
+@app.get("/metrics", dependencies=[Depends(verify_api_key)])
+def metrics():
+    """Prometheus metrics of all workers, in the text exposition format."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -0,0 +1,149 @@
+"""
+Prometheus metrics: per-route request counts, latency and response size
+histograms, in-flight requests and SQLAlchemy connection pool gauges.
+
+Under gunicorn every worker is a separate process, so the metrics use
+prometheus_client's multiprocess mode when PROMETHEUS_MULTIPROC_DIR is set
+(startup.sh does this): each worker writes its values to files in that
+directory and /metrics, whichever worker serves it, sums them up. Without
+the variable (e.g. a single uvicorn process) the in-process registry is used.
+
+Routes are labelled with their path template (/workouts/{id}), never the raw
+path, to keep the number of series bounded.
+
+Scraping: /metrics on the API port needs the X-API-Key header like every
+other route, which a stock Prometheus scrape config cannot send. Set
+METRICS_PORT to have the gunicorn master serve the same metrics without
+authentication on a separate port (see gunicorn.conf.py), and keep that port
+on the internal network only:
+
+    scrape_configs:
+      - job_name: gymli
+        static_configs:
+          - targets: ["gymli-api:9100"]   # METRICS_PORT=9100
+
+Scrapers that can set request headers can use the API port instead, passing
+the key in X-API-Key.
+"""
+import logging
+import os
+import time
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    REGISTRY,
+    start_http_server,
+)
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+REQUESTS = Counter(
+    "http_requests_total", "HTTP requests handled", ["method", "route", "status"]
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Time from request start to the last response byte", ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes", "Response body size", ["method", "route"],
+    buckets=(100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000),
+)
+IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "Requests currently being handled", multiprocess_mode="livesum"
+)
+POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections", "Connections currently checked out of the pool", multiprocess_mode="livesum"
+)
+POOL_OVERFLOW = Gauge(
+    "db_pool_overflow_connections", "Connections open beyond the pool size", multiprocess_mode="livesum"
+)
+POOL_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+
+class PrometheusMiddleware:
+    """ASGI middleware recording the HTTP metrics above; counts streamed bodies too."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            IN_FLIGHT.dec()
+            # The router stores the matched route in the scope
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            REQUESTS.labels(method, path, str(status)).inc()
+            REQUEST_LATENCY.labels(method, path).observe(time.perf_counter() - start)
+            RESPONSE_SIZE.labels(method, path).observe(size)
+
+def instrument_pool(engine):
+    """Track checked-out / overflow connections and checkout wait time of the engine's pool."""
+    pool = engine.pool
+
+    def update_gauges(*args):
+        POOL_CHECKED_OUT.set(pool.checkedout() if hasattr(pool, "checkedout") else 0)
+        POOL_OVERFLOW.set(max(pool.overflow(), 0) if hasattr(pool, "overflow") else 0)
+
+    event.listen(pool, "checkout", update_gauges)
+    event.listen(pool, "checkin", update_gauges)
+
+    # Time spent inside the pool's get, i.e. waiting for a free slot or opening a connection.
+    # The public pool events only fire once a connection is handed out, so the wait is
+    # timed around the pool's internal _do_get; skip the histogram if a pool lacks it.
+    do_get = getattr(pool, "_do_get", None)
+    if not callable(do_get):
+        logger.warning("%s has no _do_get, not recording db_pool_checkout_wait_seconds", type(pool).__name__)
+        return
+
+    def timed_do_get():
+        started = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            POOL_WAIT.observe(time.perf_counter() - started)
+
+    pool._do_get = timed_do_get
+
+def metrics_registry():
+    """The registry to expose: all workers' values in multiprocess mode, else this process's."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+def render_metrics():
+    """Return (body, content type) of the current metrics, summed over all workers in multiprocess mode."""
+    return generate_latest(metrics_registry()), CONTENT_TYPE_LATEST
+
+def start_metrics_server(port: int):
+    """Serve the metrics without authentication on a separate port, from a background thread."""
+    start_http_server(port, registry=metrics_registry())
@@ -0,0 +1,276 @@
+"""
+Versioned schema migrations.
+
+Base.metadata.create_all() only creates missing tables, it never changes
+existing ones. Schema changes to an already populated database (new indexes,
+new columns) are listed here as numbered migrations and applied in order.
+Applied versions are recorded in the schema_migrations table, so running the
+migrations repeatedly is safe.
+
+Indexes on existing tables are built with CREATE INDEX CONCURRENTLY on
+PostgreSQL, which does not block writes to the table while it runs. That
+statement cannot run inside a transaction, so a migration's steps run in
+transactional segments and each concurrent index build between them in
+autocommit mode. Every step is idempotent, so a migration interrupted between
+segments is simply run again. SQLite uses a plain CREATE INDEX.
+
+Every migration also lists the query shapes it is meant to speed up. Running
+`explain` before and after `upgrade` gives a reproducible plan comparison:
+
+    python -m app.migrations status
+    python -m app.migrations explain 1 --user-name alice   # plan before
+    python -m app.migrations upgrade
+    python -m app.migrations explain 1 --user-name alice   # plan after
+"""
+import argparse
+from datetime import datetime
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from app import models
+from app.progress import insert_volume
+
+SYNC_TABLES = [
+    "exercises", "training_sets", "workouts", "workout_units", "activities", "activity_logs",
+    "food_items", "food_logs", "calendar_notes", "calendar_workouts", "periods",
+]
+
+def add_column_if_missing(table: str, column: str, ddl_type: str):
+    """Upgrade step adding a column unless it exists (create_all may already have made it)."""
+    def step(conn):
+        if column not in {c["name"] for c in inspect(conn).get_columns(table)}:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+    return step
+
+class CreateIndex:
+    """Upgrade step creating an index on an existing table, concurrently on PostgreSQL."""
+
+    def __init__(self, name: str, table: str, *columns: str):
+        self.name = name
+        self.table = table
+        self.columns = columns
+
+    def sql(self, concurrently: bool = False) -> str:
+        keyword = "CONCURRENTLY " if concurrently else ""
+        return f"CREATE INDEX {keyword}IF NOT EXISTS {self.name} ON {self.table} ({', '.join(self.columns)})"
+
+    def __call__(self, conn):
+        conn.execute(text(self.sql()))
+
+    def create_concurrently(self, engine: Engine):
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            # A failed concurrent build leaves an invalid index that IF NOT EXISTS would keep
+            invalid = conn.execute(
+                text("SELECT NOT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"),
+                {"name": self.name},
+            ).scalar()
+            if invalid:
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {self.name}"))
+            conn.execute(text(self.sql(concurrently=True)))
+
+# Each migration: version (strictly increasing), name, the upgrade steps to
+# run (SQL strings, CreateIndex steps or callables taking the connection), and representative
+# queries (bound with :user_name) for EXPLAIN.
+MIGRATIONS = [
+    {
+        "version": 1,
+        "name": "composite indexes for hot query shapes",
+        "upgrade": [
+            CreateIndex("ix_training_sets_user_exercise_date", "training_sets", "user_name", "exercise_id", "date"),
+            CreateIndex("ix_training_sets_user_date_id", "training_sets", "user_name", "date", "id"),
+            CreateIndex("ix_food_logs_user_date", "food_logs", "user_name", "date"),
+            CreateIndex("ix_activity_logs_user_date", "activity_logs", "user_name", "date"),
+            CreateIndex("ix_activities_user_name_name", "activities", "user_name", "name"),
+        ],
+        "explain": [
+            "SELECT * FROM training_sets WHERE user_name = :user_name AND exercise_id = 1 ORDER BY date",
+            "SELECT * FROM training_sets WHERE user_name = :user_name ORDER BY date, id LIMIT 500",
+            "SELECT * FROM food_logs WHERE user_name = :user_name AND date >= '2024-01-01' ORDER BY date DESC",
+            "SELECT * FROM activity_logs WHERE user_name = :user_name AND date >= '2024-01-01' ORDER BY date DESC",
+            "SELECT * FROM activities WHERE user_name = :user_name AND name = 'Running (moderate)'",
+        ],
+    },
+    {
+        "version": 2,
+        "name": "exercise_progress summary table",
+        "upgrade": [
+            "CREATE TABLE IF NOT EXISTS exercise_progress ("
+            "user_name VARCHAR NOT NULL, "
+            "exercise_id INTEGER NOT NULL REFERENCES exercises (id), "
+            "set_count INTEGER NOT NULL, "
+            "total_volume FLOAT NOT NULL, "
+            "max_weight FLOAT NOT NULL, "
+            "best_e1rm FLOAT NOT NULL, "
+            "last_date TIMESTAMP, "
+            "PRIMARY KEY (user_name, exercise_id))",
+            # Backfill from the existing history
+            "DELETE FROM exercise_progress",
+            "INSERT INTO exercise_progress "
+            "(user_name, exercise_id, set_count, total_volume, max_weight, best_e1rm, last_date) "
+            "SELECT user_name, exercise_id, count(id), sum(weight * repetitions), max(weight), "
+            "max(weight * (1 + repetitions / 30.0)), max(date) "
+            "FROM training_sets GROUP BY user_name, exercise_id",
+        ],
+        "explain": [
+            "SELECT * FROM exercise_progress WHERE user_name = :user_name",
+        ],
+    },
+    {
+        "version": 3,
+        "name": "catalog_versions table for ETags",
+        "upgrade": [
+            "CREATE TABLE IF NOT EXISTS catalog_versions ("
+            "user_name VARCHAR NOT NULL, "
+            "table_name VARCHAR NOT NULL, "
+            "version INTEGER NOT NULL, "
+            "PRIMARY KEY (user_name, table_name))",
+        ],
+        "explain": [
+            "SELECT version FROM catalog_versions WHERE user_name = :user_name AND table_name = 'exercises'",
+        ],
+    },
+    {
+        "version": 4,
+        "name": "updated_at columns and deleted_rows tombstones for /sync",
+        "upgrade": [
+            *[add_column_if_missing(table, "updated_at", "TIMESTAMP") for table in SYNC_TABLES],
+            *[CreateIndex(f"ix_{table}_user_updated_at", table, "user_name", "updated_at") for table in SYNC_TABLES],
+            # Creates the table with its indexes, using the dialect's autoincrement for id
+            lambda conn: models.DeletedRow.__table__.create(conn, checkfirst=True),
+        ],
+        "explain": [
+            "SELECT * FROM training_sets WHERE user_name = :user_name AND updated_at > '2024-01-01'",
+            "SELECT * FROM deleted_rows WHERE user_name = :user_name AND deleted_at > '2024-01-01'",
+        ],
+    },
+    {
+        "version": 5,
+        "name": "jobs table for background jobs",
+        "upgrade": [
+            lambda conn: models.Job.__table__.create(conn, checkfirst=True),
+        ],
+        "explain": [
+            "SELECT * FROM jobs WHERE user_name = :user_name ORDER BY id DESC LIMIT 50",
+        ],
+    },
+    {
+        "version": 6,
+        "name": "position column for the order of workout units",
+        "upgrade": [
+            add_column_if_missing("workout_units", "position", "INTEGER"),
+        ],
+        "explain": [
+            "SELECT * FROM workout_units WHERE workout_id = 1 ORDER BY position, id",
+        ],
+    },
+    {
+        "version": 7,
+        "name": "exercise_volume summary table for /training_sets/muscle_volume",
+        "upgrade": [
+            lambda conn: models.ExerciseVolume.__table__.create(conn, checkfirst=True),
+            # Backfill from the existing history
+            "DELETE FROM exercise_volume",
+            lambda conn: insert_volume(conn, conn.dialect.name),
+        ],
+        "explain": [
+            "SELECT * FROM exercise_volume WHERE user_name = :user_name AND period = 'week' ORDER BY bucket",
+        ],
+    },
+]
+
+def ensure_migrations_table(engine: Engine):
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version INTEGER PRIMARY KEY, name VARCHAR NOT NULL, applied_at TIMESTAMP NOT NULL)"
+        ))
+
+def applied_versions(engine: Engine) -> set:
+    ensure_migrations_table(engine)
+    with engine.connect() as conn:
+        return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+def run_steps(conn, steps):
+    for step in steps:
+        if callable(step):
+            step(conn)
+        else:
+            conn.execute(text(step))
+
+def run_migrations(engine: Engine) -> list:
+    """
+    Apply all pending migrations in order. Returns the applied versions.
+    Each migration runs in one transaction, except for its concurrent index builds on PostgreSQL.
+    """
+    done = applied_versions(engine)
+    concurrent = engine.dialect.name == "postgresql"
+    newly_applied = []
+    for migration in sorted(MIGRATIONS, key=lambda m: m["version"]):
+        if migration["version"] in done:
+            continue
+        steps = []
+        for step in migration["upgrade"]:
+            if concurrent and isinstance(step, CreateIndex):
+                # Commit the preceding steps first (e.g. the column the index is on)
+                if steps:
+                    with engine.begin() as conn:
+                        run_steps(conn, steps)
+                    steps = []
+                step.create_concurrently(engine)
+            else:
+                steps.append(step)
+        with engine.begin() as conn:
+            run_steps(conn, steps)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:version, :name, :applied_at)"),
+                {"version": migration["version"], "name": migration["name"], "applied_at": datetime.utcnow()},
+            )
+        newly_applied.append(migration["version"])
+    return newly_applied
+
+def explain_migration(engine: Engine, version: int, user_name: str) -> list:
+    """Return (query, plan lines) for each representative query of a migration."""
+    migration = next((m for m in MIGRATIONS if m["version"] == version), None)
+    if migration is None:
+        raise ValueError(f"Unknown migration version {version}")
+
+    if engine.dialect.name == "postgresql":
+        prefix = "EXPLAIN (ANALYZE, BUFFERS) "
+    else:
+        prefix = "EXPLAIN QUERY PLAN "
+
+    plans = []
+    with engine.connect() as conn:
+        for query in migration["explain"]:
+            rows = conn.execute(text(prefix + query), {"user_name": user_name}).all()
+            plans.append((query, [" ".join(str(col) for col in row) for row in rows]))
+    return plans
+
+def main():
+    from app.db import engine
+
+    parser = argparse.ArgumentParser(description="Gymli schema migrations")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", help="List migrations and whether they are applied")
+    sub.add_parser("upgrade", help="Apply all pending migrations")
+    explain = sub.add_parser("explain", help="Show query plans for a migration's target queries")
+    explain.add_argument("version", type=int)
+    explain.add_argument("--user-name", required=True)
+    args = parser.parse_args()
+
+    if args.command == "status":
+        done = applied_versions(engine)
+        for migration in MIGRATIONS:
+            state = "applied" if migration["version"] in done else "pending"
+            print(f"{migration['version']:>4}  {state:<8} {migration['name']}")
+    elif args.command == "upgrade":
+        applied = run_migrations(engine)
+        print(f"Applied migrations: {applied}" if applied else "Database is up to date")
+    elif args.command == "explain":
+        for query, plan in explain_migration(engine, args.version, args.user_name):
+            print(query)
+            for line in plan:
+                print(f"    {line}")
+            print()
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Date, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Date, Boolean, Index, Text
 from sqlalchemy.orm import relationship
+from datetime import datetime
 from app.db import Base
 
 class Animal(Base): ### for testing purposes
@@ -37,6 +38,7 @@ class Exercise(Base):
     quadriceps = Column(Float, default=0.0)
     calves = Column(Float, default=0.0)
     forearms = Column(Float, default=0.0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Last change, for /sync
 
     # Relationships to other tables
     training_sets = relationship("TrainingSet", back_populates="exercise")  # Links to all TrainingSet rows for this Exercise
@@ -55,12 +57,46 @@ class TrainingSet(Base):
     set_type = Column(Integer, nullable=False)
     phase = Column(String, nullable=True)           
     myoreps = Column(Boolean, nullable=True)       
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Last change, for /sync
     # Relationship to WorkoutUnit
     # workout_units = relationship("WorkoutUnit", back_populates="training_set")
 
     # Relationship to Exercise
     exercise = relationship("Exercise", back_populates="training_sets")
 
+    # Composite indexes for the hot query shapes (see app/migrations.py)
+    __table_args__ = (
+        Index("ix_training_sets_user_exercise_date", "user_name", "exercise_id", "date"),
+        Index("ix_training_sets_user_date_id", "user_name", "date", "id"),
+    )
+
+# Per-(user, exercise) progress summary, kept in sync with training_sets by app/progress.py
+class ExerciseProgress(Base):
+    __tablename__ = "exercise_progress"
+
+    user_name = Column(String, primary_key=True)
+    exercise_id = Column(Integer, ForeignKey("exercises.id"), primary_key=True)
+    set_count = Column(Integer, nullable=False)  # Number of sets logged
+    total_volume = Column(Float, nullable=False)  # Sum of weight * repetitions
+    max_weight = Column(Float, nullable=False)  # Heaviest weight lifted
+    best_e1rm = Column(Float, nullable=False)  # Best estimated one-rep max (Epley)
+    last_date = Column(DateTime, nullable=True)  # Date of the most recent set
+
+# Per-(user, exercise) set count and tonnage for every day, week and month, kept in sync by app/progress.py
+class ExerciseVolume(Base):
+    __tablename__ = "exercise_volume"
+
+    user_name = Column(String, primary_key=True)
+    period = Column(String, primary_key=True)  # day, week or month
+    bucket = Column(Date, primary_key=True)  # First day of the day / ISO week / month
+    exercise_id = Column(Integer, ForeignKey("exercises.id"), primary_key=True)
+    set_count = Column(Integer, nullable=False)  # Number of sets logged in the bucket
+    tonnage = Column(Float, nullable=False)  # Sum of weight * repetitions in the bucket
+
+    __table_args__ = (
+        Index("ix_exercise_volume_user_exercise", "user_name", "exercise_id"),
+    )
+
 # A WorkoutUnit is a component of a workout (represents one exercise within a workout, with set counts).
 class WorkoutUnit(Base):
     __tablename__ = "workout_units"
@@ -72,6 +108,8 @@ class WorkoutUnit(Base):
     worksets = Column(Integer, nullable=False)  # Number of work sets
     type = Column(Integer, nullable=False)  # Type of unit (mirrors Exercise type? Or set type?)
     workout_id = Column(Integer, ForeignKey("workouts.id"), nullable=False)  # Foreign key to the Workout containing this unit
+    position = Column(Integer, nullable=True)  # Order within the workout; units without one follow in id order
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Last change, for /sync
 
     # Relationships
     exercise = relationship("Exercise", back_populates="workout_units")  # Link to Exercise
@@ -84,7 +122,8 @@ class Workout(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_name = Column(String, nullable=False, index=True)
     name = Column(String, nullable=False)
-    workout_units = relationship("WorkoutUnit", back_populates="workout", cascade="all, delete-orphan")
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Last change, for /sync
+    workout_units = relationship("WorkoutUnit", back_populates="workout", cascade="all, delete-orphan", order_by=[WorkoutUnit.position.nulls_last(), WorkoutUnit.id])
 
 # Add these to your app/models.py file
 
@@ -96,6 +135,11 @@ class Activity(Base):
     user_name = Column(String, nullable=False, index=True)
     name = Column(String, nullable=False)  # e.g., "Running", "Walking", "Rowing"
     kcal_per_hour = Column(Float, nullable=False)  # User-defined calories per hour
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Last change, for /sync
+
+    __table_args__ = (
+        Index("ix_activities_user_name_name", "user_name", "name"),
+    )
 
 class ActivityLog(Base):
     """Activity log table for tracking user's activity sessions."""
@@ -108,6 +152,11 @@ class ActivityLog(Base):
     duration_minutes = Column(Integer, nullable=False)
     calories_burned = Column(Float, nullable=False)  # Calculated from duration and kcal_per_hour
     notes = Column(String, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Last change, for /sync
+
+    __table_args__ = (
+        Index("ix_activity_logs_user_date", "user_name", "date"),
+    )
 
 
 class FoodItem(Base):
@@ -120,6 +169,7 @@ class FoodItem(Base):
     carbs_per_100g = Column(Float, nullable=False)
     fat_per_100g = Column(Float, nullable=False)
     notes = Column(String, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Last change, for /sync
 
 class FoodLog(Base):
     __tablename__ = "food_logs"
@@ -132,6 +182,11 @@ class FoodLog(Base):
     protein_per_100g = Column(Float, nullable=False)
     carbs_per_100g = Column(Float, nullable=False)
     fat_per_100g = Column(Float, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Last change, for /sync
+
+    __table_args__ = (
+        Index("ix_food_logs_user_date", "user_name", "date"),
+    )
 
 class CalendarNote(Base):
     __tablename__ = "calendar_notes"
@@ -139,6 +194,7 @@ class CalendarNote(Base):
     user_name = Column(String, nullable=False, index=True)
     date = Column(Date, nullable=False)
     note = Column(String, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Last change, for /sync
 
 class CalendarWorkout(Base):
     __tablename__ = "calendar_workouts"
@@ -146,6 +202,7 @@ class CalendarWorkout(Base):
     user_name = Column(String, nullable=False, index=True)
     date = Column(Date, nullable=False)
     workout = Column(String, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Last change, for /sync
 
 class Period(Base):
     __tablename__ = "periods"
@@ -153,4 +210,59 @@ class Period(Base):
     user_name = Column(String, nullable=False, index=True)
     type = Column(String, nullable=False)
     start_date = Column(Date, nullable=False)
-    end_date = Column(Date, nullable=False)
\ No newline at end of file
+    end_date = Column(Date, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Last change, for /sync
+
+# Per-user, per-table write counter, served as the ETag of the catalog list endpoints (see app/catalog_versions.py)
+class CatalogVersion(Base):
+    __tablename__ = "catalog_versions"
+    user_name = Column(String, primary_key=True)
+    table_name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+# Tombstones for rows deleted from the synced tables, so /sync can report deletions (see app/sync.py)
+class DeletedRow(Base):
+    __tablename__ = "deleted_rows"
+    id = Column(Integer, primary_key=True, index=True)
+    user_name = Column(String, nullable=False)
+    table_name = Column(String, nullable=False)
+    row_id = Column(Integer, nullable=True)  # NULL means every row of the table was cleared for the user
+    deleted_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_deleted_rows_user_deleted_at", "user_name", "deleted_at"),
+    )
+
+# Background jobs run by app/jobs.py, polled through /jobs/{id}
+class Job(Base):
+    __tablename__ = "jobs"
+    id = Column(Integer, primary_key=True, index=True)
+    user_name = Column(String, nullable=False, index=True)
+    kind = Column(String, nullable=False)  # e.g. "clear_training_sets"
+    state = Column(String, nullable=False, default="queued")  # queued, running, interrupted, succeeded or failed
+    progress = Column(Integer, nullable=False, default=0)  # Units of work done so far (rows, sets, ...)
+    total = Column(Integer, nullable=True)  # Expected units of work, if known
+    result = Column(Text, nullable=True)  # JSON result on success
+    error = Column(Text, nullable=True)  # Error message on failure
+    worker = Column(String, nullable=True)  # host:pid of the process running the job
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+# Synced tables by the name used in the API, with (user_name, updated_at) indexes for /sync
+SYNC_MODELS = {
+    "exercises": Exercise,
+    "training_sets": TrainingSet,
+    "workouts": Workout,
+    "workout_units": WorkoutUnit,
+    "activities": Activity,
+    "activity_logs": ActivityLog,
+    "foods": FoodItem,
+    "food_logs": FoodLog,
+    "calendar_notes": CalendarNote,
+    "calendar_workouts": CalendarWorkout,
+    "periods": Period,
+}
+for _model in SYNC_MODELS.values():
+    Index(f"ix_{_model.__tablename__}_user_updated_at", _model.user_name, _model.updated_at)
@@ -0,0 +1,243 @@
+"""
+Per-exercise progress summaries (the exercise_progress and exercise_volume tables).
+
+Progress charts need max weight, best estimated 1RM, total volume, set count
+and last training date per exercise; the muscle volume chart needs the set
+count and tonnage per exercise and day / week / month. Instead of
+aggregating the raw training_sets on every read, these are kept in
+exercise_progress and exercise_volume and updated in the same transaction
+as the training set write:
+
+- new sets are folded in incrementally with a single upsert per table
+- updates and deletes recompute only the affected (user, exercise) pairs,
+  since a max cannot be "un-applied"
+
+/training_sets/progress and /training_sets/last_dates (and /bootstrap) read
+from exercise_progress, so they cost O(exercises) rather than O(sets);
+/training_sets/muscle_volume reads exercise_volume, O(buckets x exercises).
+
+If the table ever drifts (e.g. rows changed outside the API), rebuild it:
+
+    python -m app.progress rebuild [--user-name alice]
+"""
+import argparse
+from datetime import timedelta
+from typing import Optional
+from sqlalchemy import delete, func, insert, literal, select, tuple_
+from sqlalchemy.orm import Session
+from app import models
+from app.aggregation import PERIODS, date_bucket
+from app.db import upsert_insert
+
+PROGRESS_COLUMNS = ["user_name", "exercise_id", "set_count", "total_volume", "max_weight", "best_e1rm", "last_date"]
+VOLUME_COLUMNS = ["user_name", "period", "bucket", "exercise_id", "set_count", "tonnage"]
+
+def estimated_1rm(weight, repetitions):
+    """Epley estimate of the one-rep max; works on numbers and SQL expressions alike."""
+    return weight * (1 + repetitions / 30.0)
+
+def progress_select():
+    """Aggregate training_sets into exercise_progress rows, grouped by (user_name, exercise_id)."""
+    ts = models.TrainingSet
+    return select(
+        ts.user_name,
+        ts.exercise_id,
+        func.count(ts.id),
+        func.sum(ts.weight * ts.repetitions),
+        func.max(ts.weight),
+        func.max(estimated_1rm(ts.weight, ts.repetitions)),
+        func.max(ts.date),
+    ).group_by(ts.user_name, ts.exercise_id)
+
+def volume_select(period: str, dialect_name: str):
+    """Aggregate training_sets into exercise_volume rows of one period, grouped by (user_name, bucket, exercise_id)."""
+    ts = models.TrainingSet
+    bucket = date_bucket(ts.date, period, dialect_name)
+    return select(
+        ts.user_name,
+        literal(period),
+        bucket,
+        ts.exercise_id,
+        func.count(ts.id),
+        func.sum(ts.weight * ts.repetitions),
+    ).group_by(ts.user_name, bucket, ts.exercise_id)
+
+def python_bucket(value, period: str):
+    """First day of the day / ISO week / month of a datetime, as date_bucket() computes it in SQL."""
+    day = value.date()
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    if period == "month":
+        return day.replace(day=1)
+    return day
+
+def insert_volume(db, dialect_name: str, where=None):
+    """Insert the exercise_volume rows of every period, aggregated from training_sets (optionally filtered)."""
+    table = models.ExerciseVolume.__table__
+    for period in PERIODS:
+        source = volume_select(period, dialect_name)
+        if where is not None:
+            source = source.where(where)
+        db.execute(insert(table).from_select(VOLUME_COLUMNS, source))
+
+def record_new_sets(db: Session, sets):
+    """
+    Fold newly inserted sets (dicts with the TrainingSet fields) into the summaries.
+    Does not commit; call it before the commit of the insert.
+    """
+    totals = {}
+    volumes = {}
+    for ts in sets:
+        for period in PERIODS:
+            volume_key = (ts["user_name"], period, python_bucket(ts["date"], period), ts["exercise_id"])
+            if volume_key not in volumes:
+                volumes[volume_key] = dict(zip(VOLUME_COLUMNS, volume_key), set_count=0, tonnage=0.0)
+            volumes[volume_key]["set_count"] += 1
+            volumes[volume_key]["tonnage"] += ts["weight"] * ts["repetitions"]
+        key = (ts["user_name"], ts["exercise_id"])
+        e1rm = estimated_1rm(ts["weight"], ts["repetitions"])
+        if key not in totals:
+            totals[key] = {
+                "user_name": key[0], "exercise_id": key[1], "set_count": 0, "total_volume": 0.0,
+                "max_weight": ts["weight"], "best_e1rm": e1rm, "last_date": ts["date"],
+            }
+        row = totals[key]
+        row["set_count"] += 1
+        row["total_volume"] += ts["weight"] * ts["repetitions"]
+        row["max_weight"] = max(row["max_weight"], ts["weight"])
+        row["best_e1rm"] = max(row["best_e1rm"], e1rm)
+        row["last_date"] = max(row["last_date"], ts["date"])
+    if not totals:
+        return
+
+    upsert = upsert_insert(db)
+    if upsert is None:
+        # No portable upsert; fall back to recomputing the touched pairs
+        db.flush()
+        recompute_progress(db, totals.keys())
+        return
+    # Two-argument max() is SQLite's spelling of greatest()
+    greatest = func.max if db.get_bind().dialect.name == "sqlite" else func.greatest
+
+    table = models.ExerciseProgress.__table__
+    stmt = upsert(table).values(list(totals.values()))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_name, table.c.exercise_id],
+        set_={
+            "set_count": table.c.set_count + stmt.excluded.set_count,
+            "total_volume": table.c.total_volume + stmt.excluded.total_volume,
+            "max_weight": greatest(table.c.max_weight, stmt.excluded.max_weight),
+            "best_e1rm": greatest(table.c.best_e1rm, stmt.excluded.best_e1rm),
+            "last_date": greatest(table.c.last_date, stmt.excluded.last_date),
+        },
+    )
+    db.execute(stmt)
+
+    # After the progress upsert, which takes the row locks recompute_progress waits on
+    table = models.ExerciseVolume.__table__
+    stmt = upsert(table).values(list(volumes.values()))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_name, table.c.period, table.c.bucket, table.c.exercise_id],
+        set_={
+            "set_count": table.c.set_count + stmt.excluded.set_count,
+            "tonnage": table.c.tonnage + stmt.excluded.tonnage,
+        },
+    )
+    db.execute(stmt)
+
+def recompute_volume(db: Session, pairs):
+    """
+    Recompute the exercise_volume rows of the given (user_name, exercise_id) pairs.
+    Only call it with the pairs' exercise_progress rows locked, as recompute_progress does:
+    concurrent record_new_sets() calls then wait before touching the same volume rows.
+    """
+    table = models.ExerciseVolume.__table__
+    ts = models.TrainingSet
+    db.execute(delete(table).where(tuple_(table.c.user_name, table.c.exercise_id).in_(pairs)))
+    insert_volume(db, db.get_bind().dialect.name, tuple_(ts.user_name, ts.exercise_id).in_(pairs))
+
+def recompute_progress(db: Session, pairs):
+    """
+    Recompute the summaries of the given (user_name, exercise_id) pairs from training_sets.
+    Pending ORM changes must be flushed first. Does not commit.
+
+    The summary rows are locked first, so concurrent writes to the same exercise
+    recompute one after the other and each sees the sets the other committed.
+    They are then overwritten with an upsert rather than deleted and re-inserted,
+    which would collide with a row inserted by a concurrent transaction.
+    """
+    pairs = sorted(set(pairs))
+    if not pairs:
+        return
+    table = models.ExerciseProgress.__table__
+    ts = models.TrainingSet
+    selected = tuple_(table.c.user_name, table.c.exercise_id).in_(pairs)
+    db.execute(
+        select(table.c.user_name, table.c.exercise_id)
+        .where(selected)
+        .order_by(table.c.user_name, table.c.exercise_id)
+        .with_for_update()
+    ).all()
+
+    source = progress_select().where(tuple_(ts.user_name, ts.exercise_id).in_(pairs))
+    upsert = upsert_insert(db)
+    if upsert is None:
+        db.execute(delete(table).where(selected))
+        db.execute(insert(table).from_select(PROGRESS_COLUMNS, source))
+        recompute_volume(db, pairs)
+        return
+    stmt = upsert(table).from_select(PROGRESS_COLUMNS, source)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_name, table.c.exercise_id],
+        set_={column: getattr(stmt.excluded, column) for column in PROGRESS_COLUMNS[2:]},
+    )
+    db.execute(stmt)
+    # Pairs whose last set is gone keep no summary
+    remaining = select(ts.id).where(ts.user_name == table.c.user_name, ts.exercise_id == table.c.exercise_id).exists()
+    db.execute(delete(table).where(selected, ~remaining))
+    # The upsert has locked the rows of pairs that only now got their first set as well
+    recompute_volume(db, pairs)
+
+def clear_progress(db: Session, user_name: str):
+    """Drop all summaries of a user, e.g. after clearing their training sets. Does not commit."""
+    for table in (models.ExerciseProgress.__table__, models.ExerciseVolume.__table__):
+        db.execute(delete(table).where(table.c.user_name == user_name))
+
+def rebuild_progress(db: Session, user_name: Optional[str] = None) -> int:
+    """Rebuild the summaries of one user (or everyone) from scratch and commit. Returns the exercise_progress row count."""
+    table = models.ExerciseProgress.__table__
+    volume_table = models.ExerciseVolume.__table__
+    source = progress_select()
+    wipe = delete(table)
+    wipe_volume = delete(volume_table)
+    user_filter = None
+    if user_name:
+        user_filter = models.TrainingSet.user_name == user_name
+        source = source.where(user_filter)
+        wipe = wipe.where(table.c.user_name == user_name)
+        wipe_volume = wipe_volume.where(volume_table.c.user_name == user_name)
+    db.execute(wipe)
+    db.execute(wipe_volume)
+    result = db.execute(insert(table).from_select(PROGRESS_COLUMNS, source))
+    insert_volume(db, db.get_bind().dialect.name, user_filter)
+    db.commit()
+    return result.rowcount
+
+def main():
+    from app.db import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Maintain the exercise_progress summaries")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rebuild = sub.add_parser("rebuild", help="Recompute summaries from training_sets")
+    rebuild.add_argument("--user-name", help="Only rebuild this user's summaries")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        count = rebuild_progress(db, args.user_name)
+        print(f"Rebuilt {count} exercise progress rows")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
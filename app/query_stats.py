@@ -0,0 +1,101 @@
+"""
+Per-request SQL statistics.
+
+SQLAlchemy cursor events count the statements each request executes and the
+time spent in them. The totals are sent back in a Server-Timing header:
+
+    Server-Timing: db;dur=12.4;desc="7 queries"
+
+so N+1 patterns show up in the browser's network tab or with curl -i.
+Statements slower than SLOW_QUERY_MS (default 200) are logged as warnings
+with the route and the shape of their parameters (never the values).
+
+The time is what the driver spends in execute; fetching large results is
+not included. Statements of a streaming response that run after its headers
+were sent are not included in the header.
+"""
+import logging
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+
+class RequestQueryStats:
+    def __init__(self, scope):
+        self.scope = scope
+        self.count = 0
+        self.seconds = 0.0
+
+    @property
+    def route(self) -> str:
+        route = self.scope.get("route")
+        return getattr(route, "path", self.scope.get("path", "?"))
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.seconds * 1000:.1f};desc="{self.count} queries"'
+
+_current: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+def parameters_shape(parameters, executemany: bool) -> str:
+    """Describe statement parameters without their values, e.g. '1000 x [user_name, date]'."""
+    if executemany and parameters:
+        return f"{len(parameters)} x {parameters_shape(parameters[0], False)}"
+    if isinstance(parameters, dict):
+        return f"[{', '.join(parameters)}]"
+    if isinstance(parameters, (list, tuple)):
+        return f"{len(parameters)} positional"
+    return "none"
+
+def instrument_queries(engine):
+    """Attach the counting / slow-query listeners to a (sync) engine."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        stats = _current.get()
+        if stats is not None:
+            stats.count += 1
+            stats.seconds += elapsed
+        if elapsed * 1000 >= SLOW_QUERY_MS:
+            logger.warning(
+                "Slow query (%.1f ms) on %s, parameters %s: %s",
+                elapsed * 1000,
+                stats.route if stats is not None else "-",
+                parameters_shape(parameters, executemany),
+                " ".join(statement.split())[:500],
+            )
+
+class QueryStatsMiddleware:
+    """ASGI middleware collecting the request's query stats and adding the Server-Timing header."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats(scope)
+        token = _current.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", stats.server_timing().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
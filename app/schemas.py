@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 from datetime import date
 
@@ -72,6 +72,22 @@ class TrainingSet(TrainingSetBase):
     class Config:
         orm_mode = True
 
+class ExerciseProgress(BaseModel):
+    user_name: str
+    exercise_id: int
+    set_count: int
+    total_volume: float
+    max_weight: float
+    best_e1rm: float
+    last_date: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+class TrainingSetPage(BaseModel):
+    items: List[TrainingSet]
+    next_cursor: Optional[str] = None
+
 # =========================
 # Workout Schemas
 # =========================
@@ -100,6 +116,7 @@ class WorkoutUnitBase(BaseModel):
     worksets: int
     type: int
     workout_id: int
+    position: Optional[int] = None
 
 class WorkoutUnitCreate(WorkoutUnitBase):
     pass
@@ -110,6 +127,26 @@ class WorkoutUnit(WorkoutUnitBase):
     class Config:
         orm_mode = True
 
+class WorkoutUnitDetail(WorkoutUnit):
+    """A workout unit with its exercise embedded (/workouts?include=exercise)"""
+    exercise: Optional[Exercise] = None
+
+class WorkoutDetail(Workout):
+    """A workout with its units embedded (/workouts?include=units)"""
+    workout_units: Optional[List[WorkoutUnitDetail]] = None
+
+class WorkoutPlanUnit(BaseModel):
+    """A unit of a saved plan; id is set for existing units and omitted for new ones"""
+    id: Optional[int] = None
+    exercise_id: int
+    warmups: int
+    worksets: int
+    type: int
+
+class WorkoutPlan(WorkoutBase):
+    """A workout with its complete, ordered list of units"""
+    units: List[WorkoutPlanUnit]
+
 # =========================
 # Activity Schemas
 # =========================
@@ -225,4 +262,42 @@ class PeriodCreate(PeriodBase):
 class Period(PeriodBase):
     id: int
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+# =========================
+# Bootstrap Schema
+# =========================
+
+class Bootstrap(BaseModel):
+    exercises: List[Exercise]
+    workouts: List[Workout]
+    workout_units: List[WorkoutUnit]
+    activities: List[Activity]
+    foods: List[FoodItem]
+    calendar_notes: List[CalendarNote]
+    calendar_workouts: List[CalendarWorkout]
+    periods: List[Period]
+    last_training_dates: Dict[str, str]
+    etags: Dict[str, str]
+
+# =========================
+# Job Schemas
+# =========================
+
+class Job(BaseModel):
+    id: int
+    user_name: str
+    kind: str
+    state: str
+    progress: int
+    total: Optional[int] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class JobAccepted(BaseModel):
+    message: str
+    job_id: int
+    status_url: str
@@ -0,0 +1,84 @@
+"""
+Fast JSON path for the large list endpoints (training sets, food and activity logs).
+
+Instead of hydrating ORM objects and re-validating them through response_model,
+these endpoints select only the schema's columns as Core row mappings and
+encode them straight to JSON bytes:
+
+- with orjson installed the rows are dumped as-is; they come from our own
+  tables, so validation would only repeat what the column types guarantee
+- otherwise a TypeAdapter built once per schema validates and dumps them
+
+Either way the endpoint returns the bytes in a Response, which FastAPI sends
+without running response_model again. The route keeps its response_model
+for the OpenAPI docs.
+
+Two more compact encodings are negotiated per request:
+
+- format=columnar: one array per field instead of one object per row, with
+  the user_name every row shares hoisted to the top level
+- Accept: application/msgpack: MessagePack instead of JSON (needs msgpack),
+  for either shape; datetimes are sent as ISO strings like in JSON
+"""
+from typing import List, Optional
+from fastapi import HTTPException, Request, Response
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+def wants_msgpack(request: Request) -> bool:
+    accept = request.headers.get("accept", "")
+    return any(media_type in accept for media_type in MSGPACK_MEDIA_TYPES)
+
+def _msgpack_default(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+class RowSerializer:
+    """Selects and serializes a model's rows in the shape of a response schema."""
+
+    def __init__(self, model, schema):
+        self.fields = list(schema.model_fields)
+        self.columns = [model.__table__.c[name] for name in self.fields]
+        self.adapter = TypeAdapter(List[schema])
+
+    def dumps(self, rows) -> bytes:
+        """Encode a list of row mappings selected with self.columns."""
+        if orjson is not None:
+            return orjson.dumps([dict(row) for row in rows])
+        return self.adapter.dump_json(self.adapter.validate_python([dict(row) for row in rows]))
+
+    def columnar(self, rows, user_name: str) -> dict:
+        """Pivot the rows into {"user_name", "count", "columns": {field: [values...]}}."""
+        return {
+            "user_name": user_name,
+            "count": len(rows),
+            "columns": {field: [row[field] for row in rows] for field in self.fields if field != "user_name"},
+        }
+
+    def response(self, rows, request: Optional[Request] = None, format: str = "rows", user_name: Optional[str] = None) -> Response:
+        """Encode the rows in the format and media type the request asked for."""
+        headers = {"Vary": "Accept"}
+        if request is not None and wants_msgpack(request):
+            if msgpack is None:
+                raise HTTPException(status_code=406, detail="MessagePack responses are not available on this server")
+            payload = self.columnar(rows, user_name) if format == "columnar" else [dict(row) for row in rows]
+            content = msgpack.packb(payload, default=_msgpack_default)
+            return Response(content=content, media_type=MSGPACK_MEDIA_TYPES[0], headers=headers)
+        if format == "columnar":
+            payload = self.columnar(rows, user_name)
+            content = orjson.dumps(payload) if orjson is not None else to_json(payload)
+            return Response(content=content, media_type="application/json", headers=headers)
+        return Response(content=self.dumps(rows), media_type="application/json", headers=headers)
@@ -0,0 +1,47 @@
+"""
+Change tracking for the /sync endpoint.
+
+Every synced table (models.SYNC_MODELS) has an updated_at column, set on
+insert and update. Deletions are recorded as tombstones in deleted_rows:
+
+- ORM deletes (db.delete(obj), including cascades) are captured by a
+  before_flush hook, so handlers need no extra code
+- the same hook writes a tombstone for the previous owner when an ORM update
+  moves a row to another user_name, since that user's delta sync no longer
+  selects the row
+- bulk query deletes bypass the ORM, so those handlers call
+  record_table_cleared() to write one tombstone for the whole table,
+  or record_deleted_rows() when the deleted ids are known
+"""
+from datetime import datetime
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app import models
+
+# Table name used by the API for each synced model class
+SYNC_TABLE_NAMES = {model: table for table, model in models.SYNC_MODELS.items()}
+
+@event.listens_for(Session, "before_flush")
+def record_deletions(session: Session, flush_context, instances):
+    """Add a tombstone for every synced row deleted in this flush, or moved away from its owner."""
+    now = datetime.utcnow()
+    for obj in list(session.deleted):
+        table = SYNC_TABLE_NAMES.get(type(obj))
+        if table is not None:
+            session.add(models.DeletedRow(user_name=obj.user_name, table_name=table, row_id=obj.id, deleted_at=now))
+    for obj in list(session.dirty):
+        table = SYNC_TABLE_NAMES.get(type(obj))
+        if table is None:
+            continue
+        for previous_user_name in inspect(obj).attrs.user_name.history.deleted:
+            if previous_user_name is not None and previous_user_name != obj.user_name:
+                session.add(models.DeletedRow(user_name=previous_user_name, table_name=table, row_id=obj.id, deleted_at=now))
+
+def record_table_cleared(db: Session, user_name: str, table: str):
+    """Record that all of a user's rows in a synced table were deleted. Does not commit."""
+    db.add(models.DeletedRow(user_name=user_name, table_name=table, row_id=None, deleted_at=datetime.utcnow()))
+
+def record_deleted_rows(db: Session, user_name: str, table: str, row_ids):
+    """Record rows removed by a bulk DELETE, which the before_flush hook cannot see. Does not commit."""
+    now = datetime.utcnow()
+    db.add_all([models.DeletedRow(user_name=user_name, table_name=table, row_id=row_id, deleted_at=now) for row_id in row_ids])
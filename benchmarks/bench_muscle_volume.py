@@ -0,0 +1,93 @@
+"""
+Benchmark for GET /training_sets/muscle_volume.
+
+Seeds a throwaway database (a temporary SQLite file unless --database-url
+points at an empty PostgreSQL database) with one user, 30 exercises and N
+training sets spread over five years, then times the endpoint in-process.
+The sets are inserted directly, so the exercise_volume summaries the endpoint
+reads are rebuilt afterwards. --range times the start_date/end_date path
+instead, which aggregates the raw sets of the range.
+
+    python benchmarks/bench_muscle_volume.py --sets 100000
+    python benchmarks/bench_muscle_volume.py --database-url postgresql://localhost/gymli_bench
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sets", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--period", default="week", choices=["day", "week", "month"])
+    parser.add_argument("--database-url", help="Empty database to seed (default: temporary SQLite file)")
+    parser.add_argument("--range", action="store_true", help="Request the whole five years as a start_date/end_date range")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    os.environ.setdefault("API_KEY", "bench")
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import insert
+    from sqlalchemy.orm import Session
+    from app import models
+    from app.db import Base, engine
+    from app.main import app
+    from app.api.training_sets import MUSCLE_GROUPS
+    from app.migrations import run_migrations
+    from app.progress import rebuild_progress
+
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+
+    rng = random.Random(42)
+    user = "bench_user"
+    with engine.begin() as conn:
+        exercises = [
+            dict(
+                user_name=user, name=f"exercise {i}", type=0,
+                default_rep_base=8, default_rep_max=12, default_increment=2.5,
+                **{muscle: rng.choice([0.0, 0.0, 0.25, 0.5, 1.0]) for muscle in MUSCLE_GROUPS},
+            )
+            for i in range(30)
+        ]
+        exercise_ids = [row.id for row in conn.execute(insert(models.Exercise).returning(models.Exercise.id), exercises)]
+        start = datetime(2020, 1, 1)
+        sets = [
+            dict(
+                user_name=user, exercise_id=rng.choice(exercise_ids),
+                date=start + timedelta(minutes=rng.randrange(5 * 365 * 24 * 60)),
+                weight=rng.uniform(20, 140), repetitions=rng.randint(3, 15), set_type=1,
+            )
+            for _ in range(args.sets)
+        ]
+        conn.execute(insert(models.TrainingSet), sets)
+    with Session(engine) as db:
+        rebuild_progress(db, user)
+
+    client = TestClient(app, headers={"X-API-Key": os.environ["API_KEY"]})
+    params = {"user_name": user, "period": args.period}
+    if args.range:
+        params.update(start_date=start.isoformat(), end_date=(start + timedelta(days=5 * 365)).isoformat())
+    client.get("/training_sets/muscle_volume", params=params)  # warm up
+
+    timings = []
+    for _ in range(args.runs):
+        t0 = time.perf_counter()
+        response = client.get("/training_sets/muscle_volume", params=params)
+        timings.append((time.perf_counter() - t0) * 1000)
+        response.raise_for_status()
+
+    timings.sort()
+    source = "raw sets of the range" if args.range else "exercise_volume"
+    print(f"{engine.dialect.name}: {args.sets} sets, {len(response.json()['buckets'])} {args.period} buckets from {source}, {args.runs} runs")
+    print(f"p50 {statistics.median(timings):.1f} ms, p99 {timings[int(0.99 * (len(timings) - 1))]:.1f} ms, max {timings[-1]:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Synthetic data generator for benchmarks.
+
+Populates a database with N users, each with the default catalogs (exercises,
+workouts with units, activities, foods, calendar entries, periods) and several
+years of training sets, food logs and activity logs. The output is fully
+determined by --seed, so two runs against empty databases produce the same data.
+
+    python benchmarks/generate_data.py --database-url sqlite:///bench.db --users 20 --years 3
+    python benchmarks/generate_data.py --database-url postgresql://localhost/gymli_bench --users 100
+
+Per user and year this writes about 3,100 training sets, 1,800 food logs and
+160 activity logs. The tables are created and migrated first; the target
+database should be empty.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+EXERCISES_PER_USER = 30
+WORKOUTS_PER_USER = 6
+UNITS_PER_WORKOUT = 5
+FOODS_PER_USER = 40
+SESSIONS_PER_WEEK = 3
+SETS_PER_SESSION = 20
+MEALS_PER_DAY = 5
+ACTIVITIES_PER_WEEK = 3
+INSERT_CHUNK = 5000
+
+def user_names(users: int):
+    return [f"bench_user_{i:04d}" for i in range(users)]
+
+def _insert_chunks(conn, table, rows):
+    from sqlalchemy import insert
+    for i in range(0, len(rows), INSERT_CHUNK):
+        conn.execute(insert(table), rows[i:i + INSERT_CHUNK])
+
+def populate_user(conn, rng: random.Random, user: str, years: int, end: datetime) -> dict:
+    """Write one user's catalogs and history. Returns the row count per table."""
+    from sqlalchemy import insert
+    from app import models
+    from app.api.training_sets import MUSCLE_GROUPS
+    from app.api.activities import calculate_calories_burned
+
+    start = end - timedelta(days=365 * years)
+    days = (end - start).days
+
+    exercises = [
+        dict(
+            user_name=user, name=f"exercise {i}", type=rng.randint(0, 3),
+            default_rep_base=8, default_rep_max=12, default_increment=2.5,
+            **{muscle: rng.choice([0.0, 0.0, 0.25, 0.5, 1.0]) for muscle in MUSCLE_GROUPS},
+        )
+        for i in range(EXERCISES_PER_USER)
+    ]
+    exercise_ids = [row.id for row in conn.execute(insert(models.Exercise).returning(models.Exercise.id, sort_by_parameter_order=True), exercises)]
+
+    workout_ids = [
+        row.id for row in conn.execute(
+            insert(models.Workout).returning(models.Workout.id, sort_by_parameter_order=True),
+            [dict(user_name=user, name=f"workout {i}") for i in range(WORKOUTS_PER_USER)],
+        )
+    ]
+    units = [
+        dict(user_name=user, exercise_id=rng.choice(exercise_ids), warmups=rng.randint(0, 2), worksets=rng.randint(2, 5), type=0, workout_id=workout_id)
+        for workout_id in workout_ids for _ in range(UNITS_PER_WORKOUT)
+    ]
+    _insert_chunks(conn, models.WorkoutUnit.__table__, units)
+
+    activities = [dict(user_name=user, name=f"activity {i}", kcal_per_hour=rng.choice([150, 200, 300, 400, 500, 600])) for i in range(16)]
+    _insert_chunks(conn, models.Activity.__table__, activities)
+
+    foods = [
+        dict(
+            user_name=user, name=f"food {i}", kcal_per_100g=rng.uniform(20, 600),
+            protein_per_100g=rng.uniform(0, 30), carbs_per_100g=rng.uniform(0, 80), fat_per_100g=rng.uniform(0, 40),
+        )
+        for i in range(FOODS_PER_USER)
+    ]
+    _insert_chunks(conn, models.FoodItem.__table__, foods)
+
+    sets, food_logs, activity_logs, notes, calendar = [], [], [], [], []
+    for day in range(days):
+        day_start = start + timedelta(days=day)
+        if rng.random() < SESSIONS_PER_WEEK / 7:
+            session = day_start + timedelta(hours=rng.randint(6, 20))
+            calendar.append(dict(user_name=user, date=session.date(), workout=f"workout {rng.randrange(WORKOUTS_PER_USER)}"))
+            for i in range(SETS_PER_SESSION):
+                sets.append(dict(
+                    user_name=user, exercise_id=rng.choice(exercise_ids), date=session + timedelta(minutes=3 * i),
+                    weight=round(rng.uniform(20, 140), 1), repetitions=rng.randint(3, 15), set_type=rng.choice([0, 1, 1, 1]),
+                ))
+        for meal in range(MEALS_PER_DAY):
+            food = rng.choice(foods)
+            food_logs.append(dict(
+                user_name=user, food_name=food["name"], date=day_start + timedelta(hours=7 + 3 * meal),
+                grams=rng.uniform(50, 400), kcal_per_100g=food["kcal_per_100g"], protein_per_100g=food["protein_per_100g"],
+                carbs_per_100g=food["carbs_per_100g"], fat_per_100g=food["fat_per_100g"],
+            ))
+        if rng.random() < ACTIVITIES_PER_WEEK / 7:
+            activity = rng.choice(activities)
+            duration = rng.randint(15, 90)
+            activity_logs.append(dict(
+                user_name=user, activity_name=activity["name"], date=day_start + timedelta(hours=rng.randint(6, 20)),
+                duration_minutes=duration, calories_burned=calculate_calories_burned(activity["kcal_per_hour"], duration),
+            ))
+        if rng.random() < 1 / 7:
+            notes.append(dict(user_name=user, date=day_start.date(), note=f"note {day}"))
+
+    periods = []
+    for year in range(years):
+        period_start = (start + timedelta(days=365 * year)).date()
+        periods.append(dict(user_name=user, type="cut" if year % 2 else "bulk", start_date=period_start, end_date=period_start + timedelta(days=90)))
+
+    _insert_chunks(conn, models.TrainingSet.__table__, sets)
+    _insert_chunks(conn, models.FoodLog.__table__, food_logs)
+    _insert_chunks(conn, models.ActivityLog.__table__, activity_logs)
+    _insert_chunks(conn, models.CalendarNote.__table__, notes)
+    _insert_chunks(conn, models.CalendarWorkout.__table__, calendar)
+    _insert_chunks(conn, models.Period.__table__, periods)
+    return {
+        "exercises": len(exercises), "workouts": len(workout_ids), "workout_units": len(units),
+        "activities": len(activities), "foods": len(foods), "training_sets": len(sets),
+        "food_logs": len(food_logs), "activity_logs": len(activity_logs),
+        "calendar_notes": len(notes), "calendar_workouts": len(calendar), "periods": len(periods),
+    }
+
+def populate(engine, users: int, years: int, seed: int = 42, end: datetime = datetime(2025, 1, 1)) -> dict:
+    """Create, migrate and fill the database. Returns the total row count per table."""
+    from sqlalchemy.orm import Session
+    from app.db import Base
+    from app.migrations import run_migrations
+    from app.progress import rebuild_progress
+
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+
+    rng = random.Random(seed)
+    totals = {}
+    for user in user_names(users):
+        with engine.begin() as conn:
+            for table, count in populate_user(conn, rng, user, years, end).items():
+                totals[table] = totals.get(table, 0) + count
+
+    with Session(engine) as db:
+        totals["exercise_progress"] = rebuild_progress(db)
+    return totals
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", required=True, help="Empty database to fill")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from app.db import engine
+
+    started = time.perf_counter()
+    totals = populate(engine, args.users, args.years, args.seed)
+    print(f"Generated {args.users} users x {args.years} years in {time.perf_counter() - started:.1f} s")
+    for table, count in totals.items():
+        print(f"  {table:<20} {count:>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Reproducible endpoint benchmark suite.
+
+Drives the FastAPI app in-process through httpx's ASGI transport (no network,
+no server) against a database filled by generate_data.py, and reports p50/p99
+latency and throughput per endpoint. Results are written as JSON so runs can
+be compared:
+
+    # temporary SQLite database, generated on the fly
+    python benchmarks/run_benchmarks.py --users 5 --years 2
+
+    # existing database (e.g. PostgreSQL filled with generate_data.py)
+    python benchmarks/run_benchmarks.py --database-url postgresql://localhost/gymli_bench --no-generate
+
+    # compare against an earlier run
+    python benchmarks/run_benchmarks.py --baseline benchmarks/results/20250101-120000.json
+
+Each endpoint gets --requests requests, --concurrency at a time, each for a
+randomly chosen (seeded) user.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> (path, query parameters besides user_name)
+ENDPOINTS = {
+    "exercises": ("/exercises", {}),
+    "workouts_with_units": ("/workouts", {"include": "units,exercise"}),
+    "bootstrap": ("/bootstrap", {}),
+    "training_sets": ("/training_sets", {}),
+    "training_sets_columnar": ("/training_sets", {"format": "columnar"}),
+    "training_sets_page": ("/training_sets/page", {"limit": 500}),
+    "training_sets_last_dates": ("/training_sets/last_dates", {}),
+    "training_sets_progress": ("/training_sets/progress", {}),
+    "training_sets_muscle_volume": ("/training_sets/muscle_volume", {"period": "week"}),
+    "food_logs": ("/food_logs", {}),
+    "food_logs_summary": ("/food_logs/summary", {"period": "day"}),
+    "activity_logs": ("/activity_logs", {}),
+    "activity_logs_stats": ("/activity_logs/stats", {"group_by": "month"}),
+    "sync_full": ("/sync", {}),
+}
+
+def percentile(sorted_values, fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+async def bench_endpoint(client, path: str, params: dict, users, requests: int, concurrency: int, rng: random.Random) -> dict:
+    """Send the requests with bounded concurrency and summarize their latencies."""
+    semaphore = asyncio.Semaphore(concurrency)
+    timings, errors = [], 0
+
+    async def one(user):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.get(path, params={"user_name": user, **params})
+            timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                errors += 1
+
+    await one(users[0])  # warm up
+    timings.clear()
+    errors = 0
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(rng.choice(users)) for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+
+    timings.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(statistics.median(timings), 2),
+        "p99_ms": round(percentile(timings, 0.99), 2),
+        "mean_ms": round(statistics.fmean(timings), 2),
+        "throughput_rps": round(requests / elapsed, 1),
+    }
+
+async def run_suite(app, users, names, requests: int, concurrency: int, seed: int) -> dict:
+    import httpx
+
+    rng = random.Random(seed)
+    transport = httpx.ASGITransport(app=app)
+    headers = {"X-API-Key": os.environ["API_KEY"]}
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers, timeout=None) as client:
+        for name in names:
+            path, params = ENDPOINTS[name]
+            results[name] = await bench_endpoint(client, path, params, users, requests, concurrency, rng)
+            r = results[name]
+            print(f"{name:<30} p50 {r['p50_ms']:>9.1f} ms  p99 {r['p99_ms']:>9.1f} ms  {r['throughput_rps']:>8.1f} req/s  errors {r['errors']}")
+    return results
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def print_comparison(results: dict, baseline_path: str):
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    print(f"\nCompared with {baseline_path} (p50 / p99, negative is faster):")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        deltas = [
+            (result[key] - baseline[name][key]) / baseline[name][key] * 100 if baseline[name][key] else 0.0
+            for key in ("p50_ms", "p99_ms")
+        ]
+        print(f"{name:<30} {deltas[0]:>+7.1f}%  {deltas[1]:>+7.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Database to benchmark against (default: temporary SQLite file)")
+    parser.add_argument("--no-generate", action="store_true", help="Use the existing data instead of generating it")
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--years", type=int, default=2)
+    parser.add_argument("--requests", type=int, default=50, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--endpoints", nargs="*", choices=sorted(ENDPOINTS), help="Subset of endpoints to run")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", help="Earlier result file to compare with")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    os.environ.setdefault("API_KEY", "bench")
+    sys.path.insert(0, ROOT)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    from app.db import engine
+    from app.main import app
+    from generate_data import populate, user_names
+
+    dataset = None
+    if not args.no_generate:
+        started = time.perf_counter()
+        dataset = populate(engine, args.users, args.years, args.seed)
+        print(f"Generated {args.users} users x {args.years} years in {time.perf_counter() - started:.1f} s")
+
+    names = args.endpoints or list(ENDPOINTS)
+    results = asyncio.run(run_suite(app, user_names(args.users), names, args.requests, args.concurrency, args.seed))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "dialect": engine.dialect.name,
+            "python": platform.python_version(),
+            "users": args.users,
+            "years": args.years,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "dataset": dataset,
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(ROOT, "benchmarks", "results", datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.baseline:
+        print_comparison(results, args.baseline)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+# Loaded automatically by gunicorn from the working directory (see startup.sh)
+import os
+
+def when_ready(server):
+    # Unauthenticated metrics for Prometheus on an internal port (see app/metrics.py)
+    port = os.getenv("METRICS_PORT")
+    if port:
+        from app.metrics import start_metrics_server
+        start_metrics_server(int(port))
+        server.log.info("Serving Prometheus metrics on port %s", port)
+
+def child_exit(server, worker):
+    # Drop the live gauges (in-flight requests, pool connections) of workers that exited
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
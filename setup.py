@@ -1,5 +1,8 @@
 from app.db import Base, engine
 from app.models import Animal, Exercise, TrainingSet, WorkoutUnit, Workout, Activity, ActivityLog
+from app.migrations import run_migrations
 
 Base.metadata.create_all(bind=engine)
-# This script initializes the database by creating all tables defined in the models.
\ No newline at end of file
+run_migrations(engine)
+# This script initializes the database by creating all tables defined in the models
+# and then applies any pending schema migrations (see app/migrations.py).
\ No newline at end of file
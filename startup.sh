@@ -1,3 +1,6 @@
 #!/bin/bash
 export PYTHONUNBUFFERED=1
-gunicorn -w 4 -k uvicorn.workers.UvicornWorker app.main:app
\ No newline at end of file
+# Shared directory for the per-worker Prometheus metric files (see app/metrics.py)
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/gymli-metrics}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR" && mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+gunicorn -w 4 -k uvicorn.workers.UvicornWorker app.main:app